@@ -1,21 +1,73 @@
 """
 Base Agent Class - Foundation for all specialized agents
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
+from collections import deque
+from functools import lru_cache
+from hashlib import blake2b
+import json
+import orjson
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import ChatPromptTemplate
 import logging
-import time
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of executions remembered per agent
+REASONING_HISTORY_LIMIT = 1000
+
+# List inputs longer than this are sampled in the ReAct prompt to cap prompt size and token cost
+PROMPT_SAMPLE_SIZE = 10
+
+_JSON_DECODER = json.JSONDecoder()
+
+_REACT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert AI agent named {agent_name}.
+Your role is to analyze the input, reason about the best approach, and execute the task.
+
+Available Tools:
+{tools}
+
+Use this ReAct pattern:
+1. THOUGHT: Analyze the input and plan your approach
+2. ACTION: Decide which tool(s) to use and how
+3. OBSERVATION: Consider what you learned
+4. REPEAT if needed, or provide FINAL OUTPUT
+
+Always structure your response as JSON with clear reasoning."""),
+    ("user", """Task Instructions: {instructions}
+
+Input Data:
+{inputs}
+
+Please proceed with your analysis and execution.""")
+])
+
+
+def _serialize_inputs(inputs: Dict) -> str:
+    """Render agent inputs for the prompt as compact JSON, sampling long lists"""
+    sampled = {}
+    for key, value in inputs.items():
+        if isinstance(value, list) and len(value) > PROMPT_SAMPLE_SIZE:
+            sampled[key] = value[:PROMPT_SAMPLE_SIZE]
+            sampled[f"{key}_total"] = len(value)
+        else:
+            sampled[key] = value
+    return orjson.dumps(sampled, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS).decode()
+
+
+@lru_cache(maxsize=64)
+def _format_tool_descriptions(tools: Tuple[Tuple[str, str], ...]) -> str:
+    """Render the tool list for the ReAct prompt (cached per distinct tool set)"""
+    return "\n".join(f"- {name}: {description}" for name, description in tools)
+
 class BaseAgent:
     """Base class for all agents in the workflow"""
     
     def __init__(self, agent_name: str, llm: ChatGoogleGenerativeAI):
         self.agent_name = agent_name
         self.llm = llm
-        self.reasoning_history = []
+        self.reasoning_history = deque(maxlen=REASONING_HISTORY_LIMIT)
     
     def execute(self, inputs: Dict[str, Any], instructions: str, tools: List[Dict]) -> Dict[str, Any]:
         """
@@ -29,7 +81,7 @@ class BaseAgent:
         Returns:
             Dict containing agent output
         """
-        logger.info(f"Agent {self.agent_name} starting execution")
+        logger.info("Agent %s starting execution", self.agent_name)
         
         # Build ReAct prompt
         prompt = self._build_react_prompt(inputs, instructions, tools)
@@ -40,66 +92,59 @@ class BaseAgent:
         # Take action
         result = self._act(reasoning, inputs, tools)
         
-        # Log reasoning
+        # Log a compact summary; full inputs can hold thousands of leads and would stay alive
         self.reasoning_history.append({
-            'inputs': inputs,
-            'reasoning': reasoning,
-            'result': result
+            'input_hash': blake2b(repr(inputs).encode(), digest_size=8).hexdigest(),
+            'input_items': sum(len(v) for v in inputs.values() if isinstance(v, (list, dict))),
+            'reasoning_preview': reasoning[:256],
+            'result_status': result.get('status'),
+            'result_keys': sorted(result)
         })
         
-        logger.info(f"Agent {self.agent_name} completed execution")
+        logger.info("Agent %s completed execution", self.agent_name)
         
         return result
     
     def _build_react_prompt(self, inputs: Dict, instructions: str, tools: List[Dict]) -> str:
         """Build ReAct-style prompt"""
         
-        tool_descriptions = "\n".join([
-            f"- {tool['name']}: {tool.get('description', 'No description')}"
-            for tool in tools
-        ])
-        
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert AI agent named {agent_name}.
-Your role is to analyze the input, reason about the best approach, and execute the task.
-
-Available Tools:
-{tools}
-
-Use this ReAct pattern:
-1. THOUGHT: Analyze the input and plan your approach
-2. ACTION: Decide which tool(s) to use and how
-3. OBSERVATION: Consider what you learned
-4. REPEAT if needed, or provide FINAL OUTPUT
-
-Always structure your response as JSON with clear reasoning."""),
-            ("user", """Task Instructions: {instructions}
-
-Input Data:
-{inputs}
-
-Please proceed with your analysis and execution.""")
-        ])
+        tool_descriptions = _format_tool_descriptions(
+            tuple((tool['name'], tool.get('description', 'No description')) for tool in tools)
+        )
         
-        return prompt_template.format_messages(
+        return _REACT_PROMPT.format_messages(
             agent_name=self.agent_name,
             tools=tool_descriptions or "No tools available",
             instructions=instructions,
-            inputs=inputs
+            inputs=_serialize_inputs(inputs)
         )
     
     def _reason(self, prompt: str, inputs: Dict) -> str:
         """Generate reasoning using LLM"""
         try:
-            time.sleep(1)
+            # Rate limiting is handled by the LLM client, which backs off and retries on 429
             response = self.llm.invoke(prompt)
             reasoning = response.content
-            logger.info(f"Reasoning generated: {reasoning[:200]}...")
+            logger.info("Reasoning generated: %s...", reasoning[:200])
             return reasoning
         except Exception as e:
-            logger.error(f"Error during reasoning: {e}")
+            logger.error("Error during reasoning: %s", e)
             return f"Error in reasoning: {str(e)}"
     
+    def _extract_json(self, content: str, opener: str = '{') -> Any:
+        """
+        Parse the first JSON value starting at `opener` in LLM output
+        
+        raw_decode finds the end of the value while parsing, so trailing prose is ignored
+        and the content is not rescanned. Returns None when there is no `opener`;
+        raises ValueError if the JSON is malformed.
+        """
+        start = content.find(opener)
+        if start == -1:
+            return None
+        value, _ = _JSON_DECODER.raw_decode(content, start)
+        return value
+    
     def _act(self, reasoning: str, inputs: Dict, tools: List[Dict]) -> Dict[str, Any]:
         """
         Execute action based on reasoning
@@ -114,5 +159,5 @@ Please proceed with your analysis and execution.""")
         }
     
     def get_reasoning_history(self) -> List[Dict]:
-        """Return reasoning history for analysis"""
-        return self.reasoning_history
\ No newline at end of file
+        """Return reasoning history summaries (most recent REASONING_HISTORY_LIMIT runs)"""
+        return list(self.reasoning_history)
\ No newline at end of file
@@ -2,12 +2,40 @@
 Data Enrichment Agent - Enriches prospect data using builtwith and other APIs
 """
 from typing import Dict, Any, List
-import requests
+from concurrent.futures import Future, ThreadPoolExecutor
 import logging
+import re
+import threading
+import orjson
+from cachetools import TTLCache
 from agents.base_agent import BaseAgent
+from agents.http_session import SESSION
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent BuiltWith lookups per enrichment run
+MAX_ENRICHMENT_WORKERS = 32
+
+# Tech stacks rarely change within a day, and many contacts share one company domain
+_BUILTWITH_CACHE = TTLCache(maxsize=4096, ttl=86400)
+_BUILTWITH_CACHE_LOCK = threading.Lock()
+# Lookups in flight per domain, so concurrent leads at one company share a single call
+_BUILTWITH_IN_FLIGHT: Dict[str, Future] = {}
+
+# Seniority keywords, matched against whole title tokens (so "leadership" is not "lead")
+_TITLE_TOKEN_PATTERN = re.compile(r"\w+")
+_EXECUTIVE_KEYWORDS = frozenset({
+    'vp', 'svp', 'evp', 'vice', 'chief', 'head', 'director', 'cxo', 'cto', 'ceo', 'cfo'
+})
+_MANAGER_KEYWORDS = frozenset({'manager', 'lead', 'principal'})
+
+def _copy_builtwith_data(data: Dict) -> Dict:
+    """Per-lead copy of shared BuiltWith data, including its technologies list"""
+    copied = dict(data)
+    if 'technologies' in copied:
+        copied['technologies'] = list(copied['technologies'])
+    return copied
+
 class DataEnrichmentAgent(BaseAgent):
     """Agent for enriching prospect data with additional information"""
     
@@ -18,18 +46,21 @@ class DataEnrichmentAgent(BaseAgent):
         """Enrich lead data using external APIs"""
         
         leads = inputs.get('leads', [])
-        logger.info(f"Enriching {len(leads)} leads")
-        
-        enriched_leads = []
+        logger.info("Enriching %d leads", len(leads))
         
         #builtwith_tool = next((t for t in tools if t['name'] == 'BuiltWith'), None)
         builtwith_tool = next((t for t in tools if t['name'] == 'BuiltWithTool'), None)
         
-        for lead in leads:
-            enriched_lead = self._enrich_lead(lead, builtwith_tool)
-            enriched_leads.append(enriched_lead)
+        # Lookups are network-bound, so overlap them instead of waiting on each lead in turn.
+        # map() keeps the enriched leads in the same order as the input leads.
+        if leads:
+            max_workers = min(MAX_ENRICHMENT_WORKERS, len(leads))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                enriched_leads = list(executor.map(lambda lead: self._enrich_lead(lead, builtwith_tool), leads))
+        else:
+            enriched_leads = []
         
-        logger.info(f"Enriched {len(enriched_leads)} leads")
+        logger.info("Enriched %d leads", len(enriched_leads))
         
         return {
             'enriched_leads': enriched_leads,
@@ -66,20 +97,50 @@ class DataEnrichmentAgent(BaseAgent):
     
     def _determine_seniority(self, title: str) -> str:
         """Determine seniority level from job title"""
-        title_lower = title.lower()
+        tokens = set(_TITLE_TOKEN_PATTERN.findall(title.lower()))
         
-        if any(word in title_lower for word in ['vp', 'chief', 'head', 'director']):
+        if not _EXECUTIVE_KEYWORDS.isdisjoint(tokens):
             return 'Executive'
-        elif any(word in title_lower for word in ['manager', 'lead']):
+        elif not _MANAGER_KEYWORDS.isdisjoint(tokens):
             return 'Manager'
         else:
             return 'Individual Contributor'
         
     def _call_builtwith(self, company_domain: str, api_key: str) -> Dict:
-        """Call BuiltWith API for tech stack data"""
+        """Call BuiltWith API for tech stack data, reusing cached results per domain"""
         if not company_domain or '.' not in company_domain:
-            logger.warning(f"Invalid domain provided for BuiltWith: {company_domain}")
+            logger.warning("Invalid domain provided for BuiltWith: %s", company_domain)
             return {}
+        
+        domain = company_domain.strip().lower()
+        with _BUILTWITH_CACHE_LOCK:
+            cached = _BUILTWITH_CACHE.get(domain)
+            if cached is None:
+                in_flight = _BUILTWITH_IN_FLIGHT.get(domain)
+                if in_flight is None:
+                    future = _BUILTWITH_IN_FLIGHT[domain] = Future()
+        if cached is not None:
+            logger.debug("BuiltWith cache hit for %s", domain)
+            return _copy_builtwith_data(cached)
+        if in_flight is not None:
+            logger.debug("Waiting on in-flight BuiltWith lookup for %s", domain)
+            return _copy_builtwith_data(in_flight.result())
+        
+        logger.debug("BuiltWith cache miss for %s", domain)
+        builtwith_data = {}
+        try:
+            builtwith_data = self._fetch_builtwith(domain, api_key)
+        finally:
+            with _BUILTWITH_CACHE_LOCK:
+                # Only successful lookups are cached so transient failures are retried next time
+                if builtwith_data:
+                    _BUILTWITH_CACHE[domain] = builtwith_data
+                del _BUILTWITH_IN_FLIGHT[domain]
+            future.set_result(builtwith_data)
+        return _copy_builtwith_data(builtwith_data)
+    
+    def _fetch_builtwith(self, company_domain: str, api_key: str) -> Dict:
+        """Fetch tech stack data for a domain from the BuiltWith API"""
         try:
             #import builtwith
             
@@ -90,28 +151,25 @@ class DataEnrichmentAgent(BaseAgent):
 
             # Official BuiltWith Free API Endpoint format
             url = f"https://api.builtwith.com/free1/api.json?KEY={api_key}&LOOKUP={company_domain}"
-            response = requests.get(url, timeout=10)
+            response = SESSION.get(url, timeout=10)
             
             if response.status_code!=200:
-                logger.warning(f"BuiltWith API failed with status code {response.status_code}")
+                logger.warning("BuiltWith API failed with status code %s", response.status_code)
                 return {}
             
-            data=response.json()
+            data = orjson.loads(response.content)
             # Check for API error in response structure
             if data.get('Errors'):
-                logger.error(f"BuiltWith API Error: {data['Errors']}")
+                logger.error("BuiltWith API Error: %s", data['Errors'])
                 return {}
             
-            # Extract technologies
-            technologies = []
-            # Iterate through Results -> groups to collect all tech names
-            for result in data.get('groups', []):
-                technologies.append(result.get('name', ""))
+            # Collect the distinct, non-empty tech names from Results -> groups in one pass
+            technologies = sorted({group.get('name') for group in data.get('groups', []) if group.get('name')})
             
             return {
-                'technologies': list(set(technologies)),
+                'technologies': technologies,
                 'builtwith_enriched': True
             }
         except Exception as e:
-            logger.warning(f"BuiltWith API connection error: {e}")
+            logger.warning("BuiltWith API connection error: %s", e)
             return {}
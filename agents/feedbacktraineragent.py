@@ -3,11 +3,32 @@ Feedback Trainer Agent - Analyzes performance and suggests improvements
 """
 from typing import Dict, Any, List
 import logging
+import numpy as np
 from agents.base_agent import BaseAgent
 from langchain.prompts import ChatPromptTemplate
 
 logger = logging.getLogger(__name__)
 
+_FEEDBACK_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are a B2B outreach expert analyzing campaign metrics.
+Generate actionable recommendations to improve email performance.
+
+Consider these weighted criteria when evaluating performance:
+- Open Rate (weight 0.3): Are subject lines engaging enough?
+- Click Rate (weight 0.25): Are CTAs clear and compelling?
+- Reply Rate (weight 0.25): Is targeting and personalization sufficient?
+- Meeting Rate (weight 0.2): Is follow-up strategy effective?
+
+Prioritize recommendations based on these weights and suggest improvements
+that will maximize overall campaign effectiveness."""),
+
+    ("user", """Here are campaign metrics: {metrics}
+        Here are sample responses: {responses}
+
+        Return a JSON array of recommendations with:
+        type, priority, current_performance, suggestion, expected_impact, status""")
+])
+
 class FeedbackTrainerAgent(BaseAgent):
     """Agent for analyzing campaign performance and suggesting improvements"""
     
@@ -18,10 +39,11 @@ class FeedbackTrainerAgent(BaseAgent):
         """Analyze responses and generate recommendations"""
         
         responses = inputs.get('responses', [])
-        logger.info(f"Analyzing {len(responses)} responses for feedback")
+        logger.info("Analyzing %d responses for feedback", len(responses))
         
-        # Calculate metrics
-        metrics = self._calculate_performance_metrics(responses)
+        # Calculate metrics over a column-per-field view of the responses
+        columns = self._responses_to_columns(responses)
+        metrics = self._calculate_performance_metrics(columns)
         
         # Generate recommendations
         recommendations = self._generate_recommendations(metrics, responses)
@@ -31,7 +53,7 @@ class FeedbackTrainerAgent(BaseAgent):
         if sheets_tool:
             self._write_to_sheets(recommendations, metrics, sheets_tool)
         
-        logger.info(f"Generated {len(recommendations)} recommendations")
+        logger.info("Generated %d recommendations", len(recommendations))
         
         return {
             'recommendations': recommendations,
@@ -40,63 +62,49 @@ class FeedbackTrainerAgent(BaseAgent):
             'reasoning': reasoning
         }
     
-    def _calculate_performance_metrics(self, responses: List[Dict]) -> Dict:
+    def _responses_to_columns(self, responses: List[Dict]) -> Dict[str, np.ndarray]:
+        """Convert list-of-dict responses into one NumPy array per field"""
+        total = len(responses)
+        columns = {
+            key: np.fromiter((bool(r.get(key)) for r in responses), dtype=np.bool_, count=total)
+            for key in ('opened', 'clicked', 'replied', 'meeting_booked')
+        }
+        columns['sentiment'] = np.array([r.get('sentiment') or '' for r in responses], dtype=np.str_)
+        return columns
+    
+    def _calculate_performance_metrics(self, columns: Dict[str, np.ndarray]) -> Dict:
         """Calculate detailed performance metrics"""
         
-        total = len(responses)
+        total = len(columns['opened'])
         if total == 0:
             return {}
         
         metrics = {
             'total_sent': total,
-            'open_rate': sum(1 for r in responses if r.get('opened')) / total * 100,
-            'click_rate': sum(1 for r in responses if r.get('clicked')) / total * 100,
-            'reply_rate': sum(1 for r in responses if r.get('replied')) / total * 100,
-            'meeting_rate': sum(1 for r in responses if r.get('meeting_booked')) / total * 100,
-            'positive_sentiment': sum(1 for r in responses if r.get('sentiment') == 'positive')
+            'open_rate': float(columns['opened'].mean() * 100),
+            'click_rate': float(columns['clicked'].mean() * 100),
+            'reply_rate': float(columns['replied'].mean() * 100),
+            'meeting_rate': float(columns['meeting_booked'].mean() * 100),
+            'positive_sentiment': int(np.count_nonzero(columns['sentiment'] == 'positive'))
         }
         
         return metrics
+    
     def _generate_recommendations(self, metrics: Dict, responses: List[Dict]) -> List[Dict]:
         """Generate recommendations using LLM (Gemini)"""
         
-        # Prepare a prompt
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a B2B outreach expert analyzing campaign metrics.
-Generate actionable recommendations to improve email performance.
-
-Consider these weighted criteria when evaluating performance:
-- Open Rate (weight 0.3): Are subject lines engaging enough?
-- Click Rate (weight 0.25): Are CTAs clear and compelling?
-- Reply Rate (weight 0.25): Is targeting and personalization sufficient?
-- Meeting Rate (weight 0.2): Is follow-up strategy effective?
-
-Prioritize recommendations based on these weights and suggest improvements
-that will maximize overall campaign effectiveness."""),
-
-            ("user", """Here are campaign metrics: {metrics}
-        Here are sample responses: {responses}
-
-        Return a JSON array of recommendations with:
-        type, priority, current_performance, suggestion, expected_impact, status""")
-        ])
-
         try:
             # Call Gemini LLM
-            response = self.llm.invoke(prompt.format_messages(metrics=metrics, responses=responses[:10]))
-            
-            import json
-            content = response.content
+            response = self.llm.invoke(_FEEDBACK_PROMPT.format_messages(metrics=metrics, responses=responses[:10]))
             
             # Parse JSON output
-            if '{' in content and '}' in content:
-                start = content.index('[')
-                end = content.rindex(']') + 1
-                recommendations = json.loads(content[start:end])
+            recommendations = self._extract_json(response.content, '[')
+            if isinstance(recommendations, list):
                 return recommendations
+            logger.warning("LLM returned no recommendation list, falling back to rule-based")
 
         except Exception as e:
-            logger.warning(f"LLM failed, falling back to rule-based: {e}")
+            logger.warning("LLM failed, falling back to rule-based: %s", e)
 
         # Fallback: existing rule-based logic
         return self._generate_recommendations_hardcode(metrics, responses)
@@ -156,8 +164,8 @@ that will maximize overall campaign effectiveness."""),
         """Write recommendations to Google Sheets"""
         
         # In production, this would use Google Sheets API
-        logger.info(f"Would write {len(recommendations)} recommendations to Google Sheets")
-        logger.info(f"Metrics: {metrics}")
+        logger.info("Would write %d recommendations to Google Sheets", len(recommendations))
+        logger.info("Metrics: %s", metrics)
         
         # Mock implementation
         return True
\ No newline at end of file
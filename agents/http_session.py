@@ -0,0 +1,100 @@
+"""
+HTTP Session - Shared connection-pooled requests session for external API calls
+"""
+from typing import Any, Callable, Dict
+from urllib.parse import urlparse
+import logging
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeout in seconds for vendor API calls; a hung endpoint should
+# fail fast and fall back to mock data instead of blocking the whole graph step
+DEFAULT_TIMEOUT = (3, 10)
+
+
+def _build_session() -> requests.Session:
+    """Build a session that keeps TCP+TLS connections alive between calls"""
+    session = requests.Session()
+
+    # Retries only apply to idempotent methods by default, so POSTs are never re-sent
+    retry = Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retry)
+    session.mount('https://', adapter)
+
+    return session
+
+
+# Shared by all agents so every search, enrichment, outreach and tracking call reuses one
+# warm pool. Auth stays in per-request headers since Apollo, Clay and BuiltWith differ.
+# requests.Session is safe to use from the agents' worker threads.
+SESSION = _build_session()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint after repeated failures
+
+    After fail_max consecutive failures the circuit opens and calls raise
+    CircuitOpenError immediately. Once reset_timeout seconds have passed, one trial
+    call is let through: success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, name: str, fail_max: int = 3, reset_timeout: float = 60):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Call func through the breaker; exceptions and 5xx responses count as failures"""
+        with self._lock:
+            if self._opened_at is not None:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"Circuit open for {self.name}")
+                # Half-open: let this call through as the trial, keep others failing fast
+                self._opened_at = time.monotonic()
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self._record_failure()
+            raise
+
+        if isinstance(result, requests.Response) and result.status_code >= 500:
+            self._record_failure()
+        else:
+            with self._lock:
+                self._failures = 0
+                self._opened_at = None
+        return result
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                if self._opened_at is None:
+                    logger.warning("Circuit opened for %s after %d failures", self.name, self._failures)
+                self._opened_at = time.monotonic()
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def breaker_for(url: str) -> CircuitBreaker:
+    """Process-wide circuit breaker shared by all calls to the url's host"""
+    host = urlparse(url).netloc
+    with _BREAKERS_LOCK:
+        if host not in _BREAKERS:
+            _BREAKERS[host] = CircuitBreaker(host)
+        return _BREAKERS[host]
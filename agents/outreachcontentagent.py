@@ -1,13 +1,61 @@
 """
 Outreach Content Agent - Generates personalized outreach messages
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import logging
+import re
+from cachetools import LRUCache
 from agents.base_agent import BaseAgent
 from langchain.prompts import ChatPromptTemplate
 
 logger = logging.getLogger(__name__)
 
+# Generated message templates keyed on the prompt variables plus industry.
+# The LLM writes placeholders instead of the lead's name and company, so a template never
+# carries one lead's identity into another lead's email.
+_MESSAGE_CACHE = LRUCache(maxsize=1024)
+_PLACEHOLDER_PATTERN = re.compile(r"\{(contact_name|first_name|company)\}")
+
+_OUTREACH_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert {persona} writing personalized outreach emails.
+Write in a {tone} tone. Keep emails concise (3-4 sentences max).
+Focus on the prospect's pain points and how we can help.
+Never write a real person or company name: use the literal placeholders {{contact_name}},
+{{first_name}} and {{company}} instead, exactly as written."""),
+    ("user", """Write a personalized email for:
+Title: {title}
+Signal: {signal}
+Technologies: {technologies}
+
+Our company: Axxxxxxx.ai - AI-powered analytics for B2B revenue teams.
+Goal: Book a 15-minute discovery call.
+
+Return JSON with 'subject' and 'body' fields.""")
+])
+
+# Fallback email, rendered with format_map against the lead itself
+_FALLBACK_SUBJECT = "Quick question about {company}'s analytics"
+_FALLBACK_BODY = """Hi {contact_name},
+
+I noticed {company} is {signal}. Many {title} we work with struggle to get actionable insights from their data.
+
+Axxxxxxx.ai helps B2B teams like yours turn raw data into revenue-driving decisions. Would you be open to a quick 15-min call to explore if we can help?
+
+Best regards"""
+
+
+class _FallbackValues(dict):
+    """Lead fields for the fallback template; missing fields resolve to neutral defaults"""
+    _DEFAULTS = {
+        'company': 'your company',
+        'contact_name': 'there',
+        'signal': 'growing fast',
+        'title': 'sales leaders'
+    }
+
+    def __missing__(self, key):
+        return self._DEFAULTS[key]
+
 class OutreachContentAgent(BaseAgent):
     """Agent for generating personalized outreach content"""
     
@@ -24,11 +72,13 @@ class OutreachContentAgent(BaseAgent):
         # Only generate for top leads (grade A and B)
         top_leads = [l for l in ranked_leads if l.get('grade') in ['A', 'B']]
         
-        logger.info(f"Generating outreach for {len(top_leads)} top leads")
+        logger.info("Generating outreach for %d top leads", len(top_leads))
+        
+        selected_leads = top_leads[:20]  # Limit to top 20
+        generated = self._generate_messages(selected_leads, persona, tone)
         
         messages = []
-        for lead in top_leads[:20]:  # Limit to top 20
-            message = self._generate_message(lead, persona, tone)
+        for lead, message in zip(selected_leads, generated):
             messages.append({
                 'lead': lead.get('contact_name', 'Unknown'),
                 'email': lead.get('email', ''),
@@ -39,7 +89,7 @@ class OutreachContentAgent(BaseAgent):
                 'grade': lead.get('grade', 'N/A')
             })
         
-        logger.info(f"Generated {len(messages)} personalized messages")
+        logger.info("Generated %d personalized messages", len(messages))
         
         return {
             'messages': messages,
@@ -47,59 +97,108 @@ class OutreachContentAgent(BaseAgent):
             'reasoning': reasoning
         }
     
-    def _generate_message(self, lead: Dict, persona: str, tone: str) -> Dict:
-        """Generate a personalized message for a lead"""
+    def _generate_messages(self, leads: List[Dict], persona: str, tone: str) -> List[Dict]:
+        """Generate personalized messages for a batch of leads in parallel"""
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert {persona} writing personalized outreach emails.
-Write in a {tone} tone. Keep emails concise (3-4 sentences max).
-Focus on the prospect's pain points and how we can help."""),
-            ("user", """Write a personalized email for:
-Contact: {contact_name}
-Title: {title}
-Company: {company}
-Signal: {signal}
-Technologies: {technologies}
-
-Our company: Axxxxxxx.ai - AI-powered analytics for B2B revenue teams.
-Goal: Book a 15-minute discovery call.
-
-Return JSON with 'subject' and 'body' fields.""")
-        ])
+        messages: List[Optional[Dict]] = [None] * len(leads)
+        pending = []
+        for i, lead in enumerate(leads):
+            cached = self._get_cached_message(lead, persona, tone)
+            if cached:
+                messages[i] = cached
+            else:
+                pending.append(i)
         
-        try:
-            response = self.llm.invoke(
-                prompt.format_messages(
-                    persona=persona,
-                    tone=tone,
-                    contact_name=lead.get('contact_name', 'there'),
-                    title=lead.get('title', 'sales leader'),
-                    company=lead.get('company', 'your company'),
-                    signal=lead.get('signal', 'interest in analytics'),
-                    technologies=', '.join(lead.get('technologies', []))
-                )
-            )
+        logger.info("Message cache: %d hits, %d misses", len(leads) - len(pending), len(pending))
+        
+        if pending:
+            # Leads with identical template variables render identical prompts, so each
+            # distinct prompt is sent once and its response fanned back out to every lead
+            unique_vars = {}
+            slots = []
+            for i in pending:
+                variables = tuple(self._message_prompt_vars(leads[i], persona, tone).items())
+                slots.append(unique_vars.setdefault(variables, len(unique_vars)))
+            prompts = [_OUTREACH_PROMPT.format_messages(**dict(variables)) for variables in unique_vars]
+            
+            logger.info("Dispatching %d unique prompts for %d leads", len(prompts), len(pending))
+            
+            try:
+                # One batched dispatch overlaps the per-lead LLM round-trips
+                responses = self.llm.batch(prompts, config={"max_concurrency": 10}, return_exceptions=True)
+            except Exception as e:
+                logger.warning("Error generating messages with LLM: %s", e)
+                responses = [e] * len(prompts)
             
-            import json
-            content = response.content
+            for i, slot in zip(pending, slots):
+                template = self._parse_message(responses[slot], leads[i])
+                if template:
+                    _MESSAGE_CACHE[self._message_cache_key(leads[i], persona, tone)] = template
+                    messages[i] = self._render_template(template, leads[i])
+                else:
+                    messages[i] = self._fallback_message(leads[i])
+        
+        return messages
+    
+    def _message_cache_key(self, lead: Dict, persona: str, tone: str) -> Tuple:
+        """Cache key built from the exact prompt variables, so a template is only reused for
+        leads that would have produced the same prompt; name and company are never part of it"""
+        prompt_vars = tuple(self._message_prompt_vars(lead, persona, tone).items())
+        return (prompt_vars, lead.get('company_industry') or '')
+    
+    def _get_cached_message(self, lead: Dict, persona: str, tone: str) -> Optional[Dict]:
+        """Render a cached message template for this lead, if one exists"""
+        template = _MESSAGE_CACHE.get(self._message_cache_key(lead, persona, tone))
+        if template is None:
+            return None
+        return self._render_template(template, lead)
+    
+    def _render_template(self, template: Dict, lead: Dict) -> Dict:
+        """Fill a template's placeholders with the lead's name and company"""
+        contact_name = lead.get('contact_name') or 'there'
+        values = {
+            'contact_name': contact_name,
+            'first_name': contact_name.split()[0] if contact_name.split() else contact_name,
+            'company': lead.get('company') or 'your company'
+        }
+        # Only the known placeholders are substituted; other braces in the text are left alone
+        substitute = lambda match: values[match.group(1)]
+        return {field: _PLACEHOLDER_PATTERN.sub(substitute, text) for field, text in template.items()}
+    
+    def _message_prompt_vars(self, lead: Dict, persona: str, tone: str) -> Dict[str, Any]:
+        """Template variables for a single lead's outreach prompt"""
+        
+        return {
+            'persona': persona,
+            'tone': tone,
+            'title': (lead.get('title') or 'sales leader').strip(),
+            'signal': lead.get('signal') or 'interest in analytics',
+            'technologies': ', '.join(lead.get('technologies') or [])
+        }
+    
+    def _parse_message(self, response: Any, lead: Dict) -> Optional[Dict]:
+        """Extract the message template JSON from an LLM response, or None if it is unusable"""
+        
+        if isinstance(response, Exception):
+            logger.warning("Error generating message with LLM: %s", response)
+            return None
+        
+        try:
             # Try to extract JSON from response
-            if '{' in content and '}' in content:
-                start = content.index('{')
-                end = content.rindex('}') + 1
-                message_data = json.loads(content[start:end])
-                return message_data
+            message_data = self._extract_json(response.content, '{')
+            if message_data and isinstance(message_data.get('subject'), str) and isinstance(message_data.get('body'), str):
+                return {'subject': message_data['subject'], 'body': message_data['body']}
             
         except Exception as e:
-            logger.warning(f"Error generating message with LLM: {e}")
+            logger.warning("Error parsing LLM message: %s", e)
         
-        # Fallback template
+        return None
+    
+    def _fallback_message(self, lead: Dict) -> Dict:
+        """Template message used when the LLM output is unusable"""
+        # Empty or None fields fall back to the defaults as well
+        values = _FallbackValues({key: value for key, value in lead.items() if value})
         return {
-            'subject': f"Quick question about {lead.get('company', 'your company')}'s analytics",
-            'body': f"""Hi {lead.get('contact_name', 'there')},
-
-I noticed {lead.get('company', 'your company')} is {lead.get('signal', 'growing fast')}. Many {lead.get('title', 'sales leaders')} we work with struggle to get actionable insights from their data.
-
-Axxxxxxx.ai helps B2B teams like yours turn raw data into revenue-driving decisions. Would you be open to a quick 15-min call to explore if we can help?
-
-Best regards"""
+            'subject': _FALLBACK_SUBJECT.format_map(values),
+            'body': _FALLBACK_BODY.format_map(values)
         }
@@ -2,13 +2,30 @@
 Outreach Executor Agent - Sends emails and tracks delivery
 """
 from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import logging
+import os
+import random
 import time
-from agents.base_agent import BaseAgent
+import orjson
 import requests
+from urllib3.exceptions import NewConnectionError
+from agents.base_agent import BaseAgent
+from agents.http_session import SESSION
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent email sends per campaign
+MAX_SEND_WORKERS = 32
+
+# Bulk send: recipients per request and concurrent in-flight requests
+BATCH_SIZE = 50
+MAX_BATCH_WORKERS = 4
+
+# Single-send endpoint used when the Apollo tool config doesn't set one
+DEFAULT_APOLLO_SEND_ENDPOINT = "https://api.apollo.io/v1/emails"
+
 class OutreachExecutorAgent(BaseAgent):
     """Agent for executing outreach campaigns"""
     
@@ -20,21 +37,30 @@ class OutreachExecutorAgent(BaseAgent):
         """Send outreach emails"""
         
         messages = inputs.get('messages', [])
-        logger.info(f"Executing outreach for {len(messages)} messages")
+        logger.info("Executing outreach for %d messages", len(messages))
         
         apollo_tool = next((t for t in tools if t['name'] == 'ApolloAPI'), None)
         
-        sent_status = []
         campaign_id = f"campaign_{int(time.time())}"
         
-        for message in messages:
-            #status=self._send_email_apollo(message,apollo_tool,campaign_id)
-            status = self._send_email(message, apollo_tool, campaign_id)
-            sent_status.append(status)
+        # Sends wait on the network, so overlap them; map() keeps statuses in message order
+        if messages and self._batch_send_enabled(apollo_tool):
+            chunks = list(self._chunk_messages(messages, BATCH_SIZE))
+            max_workers = min(MAX_BATCH_WORKERS, len(chunks))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                chunk_statuses = executor.map(lambda c: self._send_email_apollo_batch(c, apollo_tool, campaign_id), chunks)
+                sent_status = [status for statuses in chunk_statuses for status in statuses]
+        elif messages:
+            max_workers = min(MAX_SEND_WORKERS, len(messages))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                #sent_status = list(executor.map(lambda m: self._send_email_apollo(m, apollo_tool, campaign_id), messages))
+                sent_status = list(executor.map(lambda m: self._send_email(m, apollo_tool, campaign_id), messages))
+        else:
+            sent_status = []
         
         success_count = sum(1 for s in sent_status if s['status'] == 'sent')
         
-        logger.info(f"Sent {success_count}/{len(messages)} emails successfully")
+        logger.info("Sent %d/%d emails successfully", success_count, len(messages))
         
         return {
             'sent_status': sent_status,
@@ -50,12 +76,12 @@ class OutreachExecutorAgent(BaseAgent):
         # In production, this would call SendGrid or Apollo API
         # For now, we'll simulate sending
         
-        logger.info(f"Sending email to {message.get('email', 'unknown')}")
+        logger.info("Sending email to %s", message.get('email', 'unknown'))
 
-
-        # Simulate API call delay
-        import random
-        time.sleep(0.1)
+        # Optional simulated API latency (seconds); off by default so dev and test runs don't wait
+        delay = float(os.getenv('EMAIL_SIMULATE_DELAY_S', '0'))
+        if delay > 0:
+            time.sleep(delay)
         
         # Simulate 95% success rate
         success = random.random() < 0.95
@@ -100,8 +126,8 @@ class OutreachExecutorAgent(BaseAgent):
                 "campaign_id": campaign_id
             }
             
-            response = requests.post(
-                "https://api.apollo.io/v1/emails",
+            response = SESSION.post(
+                apollo_tool['config'].get('endpoint') or DEFAULT_APOLLO_SEND_ENDPOINT,
                 headers=headers,
                 json=payload,
                 timeout=15
@@ -114,7 +140,7 @@ class OutreachExecutorAgent(BaseAgent):
         
         except Exception as e:
             error_message = str(e)
-            logger.error(f"Error sending email to {email}: {e}")
+            logger.error("Error sending email to %s: %s", email, e)
         
         return {
             'email': email,
@@ -125,3 +151,102 @@ class OutreachExecutorAgent(BaseAgent):
             'sent_at': time.strftime('%Y-%m-%d %H:%M:%S'),
             'error': None if success else error_message
         }
+
+    def _batch_send_enabled(self, apollo_tool: Dict = None) -> bool:
+        """Bulk sending is used when the Apollo tool has a key and a batch_endpoint configured"""
+        if not apollo_tool:
+            return False
+        config = apollo_tool.get('config', {})
+        api_key = config.get('api_key', '')
+        return bool(config.get('batch_endpoint')) and bool(api_key) and not api_key.startswith('MISSING')
+
+    def _chunk_messages(self, messages: List[Dict], size: int):
+        """Yield consecutive chunks of at most `size` messages"""
+        iterator = iter(messages)
+        chunk = list(islice(iterator, size))
+        while chunk:
+            yield chunk
+            chunk = list(islice(iterator, size))
+
+    def _send_email_apollo_batch(self, messages: List[Dict], apollo_tool: Dict, campaign_id: str) -> List[Dict]:
+        """
+        Send a chunk of emails in one Apollo request
+        
+        Emails are only re-sent one at a time when Apollo cannot have delivered them:
+        the connection was never made, or the response rejects that recipient. Any other
+        failure leaves the chunk's outcome unknown, and it is reported rather than retried
+        so no recipient gets the same email twice.
+        """
+        config = apollo_tool['config']
+        headers = {
+            'Authorization': f"Bearer {config['api_key']}",
+            'Content-Type': 'application/json'
+        }
+        payload = {
+            "emails": [
+                {
+                    "email_subject": message.get('subject', 'Hello from Axxxxxxx.ai'),
+                    "email_body": message.get('email_body', ''),
+                    "to_email": message.get('email', ''),
+                    "from_email": "you@yourdomain.com",  # must be verified in Apollo
+                    "campaign_id": campaign_id
+                }
+                for message in messages
+            ]
+        }
+        
+        try:
+            response = SESSION.post(config['batch_endpoint'], headers=headers, json=payload, timeout=30)
+        except Exception as e:
+            if self._request_not_sent(e):
+                logger.warning("Apollo batch send could not connect (%s), sending %d emails individually", e, len(messages))
+                return [self._send_email_apollo(message, apollo_tool, campaign_id) for message in messages]
+            logger.error("Apollo batch send failed after the request went out (%s); %d emails not retried", e, len(messages))
+            return [self._batch_status(message, campaign_id, 'unknown', f"Batch outcome unknown: {e}") for message in messages]
+        
+        if response.status_code != 200:
+            logger.warning("Apollo batch send returned %s for %d emails", response.status_code, len(messages))
+            error = f"Apollo returned {response.status_code}: {response.text}"
+            return [self._batch_status(message, campaign_id, 'failed', error) for message in messages]
+        
+        # One result per email, in request order: {"status": "sent" | <rejection>, "error": ...}
+        try:
+            results = orjson.loads(response.content)['results']
+            if not isinstance(results, list) or len(results) != len(messages):
+                raise ValueError(f"expected {len(messages)} results, got {results!r:.200}")
+        except Exception as e:
+            logger.error("Unreadable Apollo batch response (%s); %d emails not retried", e, len(messages))
+            return [self._batch_status(message, campaign_id, 'unknown', f"Batch outcome unknown: {e}") for message in messages]
+        
+        sent_status = []
+        rejected = 0
+        for message, result in zip(messages, results):
+            if isinstance(result, dict) and result.get('status') == 'sent':
+                sent_status.append(self._batch_status(message, campaign_id, 'sent'))
+            else:
+                # Apollo reported this recipient as not sent, so a single retry can't duplicate it
+                rejected += 1
+                sent_status.append(self._send_email_apollo(message, apollo_tool, campaign_id))
+        if rejected:
+            logger.warning("Apollo batch rejected %d of %d emails; retried them individually", rejected, len(messages))
+        return sent_status
+    
+    def _request_not_sent(self, error: Exception) -> bool:
+        """True when the request failed before reaching Apollo (connect timeout or refused)"""
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+            return isinstance(getattr(error.args[0], 'reason', None), NewConnectionError)
+        return False
+    
+    def _batch_status(self, message: Dict, campaign_id: str, status: str, error: str = None) -> Dict:
+        """Delivery record for one email of a batch"""
+        return {
+            'email': message.get('email', ''),
+            'contact_name': message.get('lead', ''),
+            'company': message.get('company', ''),
+            'status': status,
+            'campaign_id': campaign_id,
+            'sent_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'error': error
+        }
@@ -1,13 +1,51 @@
 """
 Prospect Search Agent - Searches for prospects using Clay and Apollo APIs
 """
-from typing import Dict, Any, List
-import requests
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
 import logging
+import threading
+import time
+import orjson
+from cachetools import LRUCache
 from agents.base_agent import BaseAgent
+from agents.http_session import DEFAULT_TIMEOUT, SESSION, breaker_for
+from agents.semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
+# Search responses keyed on (endpoint, payload); each entry is (expires_at, data).
+# The TTL defaults to 5 minutes and can be set per tool via config['cache_ttl'].
+DEFAULT_CACHE_TTL = 300
+_RESPONSE_CACHE = LRUCache(maxsize=512)
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+# Leads for previously seen ICP+signals queries, matched by embedding similarity so
+# paraphrased ICPs skip the Apollo/Clay calls entirely. Opt-in per step with
+# "semantic_cache": true, since the first lookup loads (or downloads) the embedding model.
+_SEMANTIC_CACHE = SemanticCache("prospect_search")
+MOCK_LEAD_COUNT = 5
+
+# Mock lead data, used whenever an API key is missing or a search fails
+_MOCK_COMPANIES = (
+    'TechCorp Solutions', 'DataDrive Inc', 'CloudScale Systems',
+    'Innovation Labs', 'Digital Ventures', 'SmartOps Co',
+    'FutureStack Inc', 'AgileWorks', 'NexGen Software', 'Quantum Analytics'
+)
+_MOCK_COMPANY_SLUGS = tuple(company.lower().replace(" ", "") for company in _MOCK_COMPANIES)
+
+_MOCK_TITLES = ('VP of Sales', 'Head of Revenue', 'Chief Revenue Officer',
+                'Sales Director', 'VP Marketing')
+
+_MOCK_SIGNALS = {
+    'recent_funding': 'Recent $10M Series B',
+    'hiring_for_sales': 'Hiring 5+ sales roles',
+    'tech_stack_change': 'Migrating to new CRM',
+    'expansion': 'Opening new office'
+}
+
 class ProspectSearchAgent(BaseAgent):
     """Agent for discovering B2B prospects using external APIs"""
     
@@ -20,43 +58,94 @@ class ProspectSearchAgent(BaseAgent):
         icp = inputs.get('icp', {})
         signals = inputs.get('signals', [])
         
-        logger.info(f"Searching for prospects with ICP: {icp}")
+        logger.info("Searching for prospects with ICP: %s", icp)
         
-        leads = []
+        searches = []
         
         # Search using Apollo API
         apollo_tool = next((t for t in tools if t['name'] == 'ApolloAPI'), None)
         if apollo_tool:
-            apollo_leads = self._search_apollo(icp, signals, apollo_tool['config'])
-            leads.extend(apollo_leads)
+            searches.append(('Apollo', self._search_apollo, apollo_tool['config']))
         
         # Search using Clay API
         clay_tool = next((t for t in tools if t['name'] == 'ClayAPI'), None)
         if clay_tool:
-            clay_leads = self._search_clay(icp, signals, clay_tool['config'])
-            leads.extend(clay_leads)
+            searches.append(('Clay', self._search_clay, clay_tool['config']))
+        
+        # A search without an API key is always mocked, so only fully keyed steps use the cache
+        use_cache = (inputs.get('semantic_cache', False) and bool(searches)
+                     and all(self._has_api_key(config) for _, _, config in searches))
+        namespace = self._cache_namespace(inputs, searches)
+        query = json.dumps({'icp': icp, 'signals': signals}, sort_keys=True)
+        if use_cache:
+            cached_leads = _SEMANTIC_CACHE.get(namespace, query)
+            if cached_leads is not None:
+                return {
+                    'leads': cached_leads,
+                    'count': len(cached_leads),
+                    'sources': ['Apollo', 'Clay'],
+                    'mock_data': False,
+                    'reasoning': reasoning
+                }
+        
+        # Both searches are network-bound, so run them side by side; latency becomes the slower one
+        leads = []
+        all_live = True
+        if searches:
+            with ThreadPoolExecutor(max_workers=len(searches)) as executor:
+                futures = [
+                    (source, executor.submit(search, icp, signals, config))
+                    for source, search, config in searches
+                ]
+                # Collect in submission order so deduplication keeps the same lead every run
+                for source, future in futures:
+                    try:
+                        source_leads, is_mock = future.result()
+                        leads.extend(source_leads)
+                        all_live = all_live and not is_mock
+                    except Exception as e:
+                        all_live = False
+                        logger.error("%s search failed: %s", source, e)
         
         # Deduplicate leads
         unique_leads = self._deduplicate_leads(leads)
         
-        logger.info(f"Found {len(unique_leads)} unique prospects")
+        logger.info("Found %d unique prospects", len(unique_leads))
+        
+        # Results holding any mock fallback leads are never cached, so fake contacts are not
+        # replayed and a later run with the API back up still hits it
+        if use_cache and all_live:
+            _SEMANTIC_CACHE.set(namespace, query, unique_leads)
         
         return {
             'leads': unique_leads,
             'count': len(unique_leads),
             'sources': ['Apollo', 'Clay'],
+            'mock_data': not all_live,
             'reasoning': reasoning
         }
     
+    def _cache_namespace(self, inputs: Dict, searches: List[Tuple]) -> str:
+        """Semantic cache partition: the step's cache_namespace plus a hash of the endpoints
+        searched, so workflows pointed at different Apollo/Clay endpoints never share leads"""
+        endpoints = [(source, config.get('endpoint', '')) for source, _, config in searches]
+        endpoint_hash = hashlib.blake2b(orjson.dumps(endpoints), digest_size=8).hexdigest()
+        return f"{inputs.get('cache_namespace', 'default')}:{endpoint_hash}"
+    
+    def _has_api_key(self, config: Dict) -> bool:
+        """Whether a search tool is configured with a usable API key"""
+        api_key = config.get('api_key', '')
+        return bool(api_key) and not api_key.startswith('MISSING')
+    
     #This wont work for free tier as contact info isnt available for free on apollo
-    def _search_apollo(self, icp: Dict, signals: List[str], config: Dict) -> List[Dict]:
-        """Search Apollo API for prospects"""
+    def _search_apollo(self, icp: Dict, signals: List[str], config: Dict) -> Tuple[List[Dict], bool]:
+        """Search Apollo API for prospects; returns (leads, is_mock)"""
         api_key = config.get('api_key', '')
         endpoint = config.get('endpoint', '')
         
         if not api_key or api_key.startswith('MISSING'):
             logger.warning("Apollo API key not configured, returning mock data")
-            return self._generate_mock_leads('Apollo', icp, 5)
+            return self._generate_mock_leads('Apollo', icp, MOCK_LEAD_COUNT), True
         
         try:
             headers = {'Content-Type': 'application/json','Cache-Control': 'no-cache','x-api-key': api_key}
@@ -75,39 +164,38 @@ class ProspectSearchAgent(BaseAgent):
                 'per_page': 25
             }
             #per_page=1 for test
-            response = requests.post(endpoint, json=search_data, headers=headers, timeout=30)
+            status_code, data = self._cached_post(endpoint, search_data, headers, config.get('cache_ttl', DEFAULT_CACHE_TTL))
             
-            if response.status_code == 200:
-                data = response.json()
-                leads = []
-                
-                for person in data.get('people', []):
-                    leads.append({
+            if status_code == 200:
+                signal = signals[0] if signals else 'general'
+                return [
+                    {
                         'company': person.get('organization', {}).get('name', ''),
                         'contact_name': person.get('name', ''),
                         'email': person.get('email', ''),
                         'linkedin': person.get('linkedin_url', ''),
                         'title': person.get('title', ''),
-                        'signal': signals[0] if signals else 'general',
+                        'signal': signal,
                         'source': 'Apollo'
-                    })
-                
-                return leads
+                    }
+                    for person in data.get('people', ())
+                ], False
             else:
-                logger.warning(f"Apollo API returned status {response.status_code}")
-                return self._generate_mock_leads('Apollo', icp, 5)
+                logger.warning("Apollo API returned status %s", status_code)
+                return self._generate_mock_leads('Apollo', icp, MOCK_LEAD_COUNT), True
             #return self._generate_mock_leads('Apollo', icp, 5)             
         except Exception as e:
-            logger.error(f"Error calling Apollo API: {e}")
-            return self._generate_mock_leads('Apollo', icp, 5)
+            logger.error("Error calling Apollo API: %s", e)
+            return self._generate_mock_leads('Apollo', icp, MOCK_LEAD_COUNT), True
     #from apollo free tier (organization data), getting company name and other info and adding mock contact details
-    def _search_apollo_mock(self, icp: Dict, signals: List[str], config: Dict) -> List[Dict]:
+    def _search_apollo_mock(self, icp: Dict, signals: List[str], config: Dict) -> Tuple[List[Dict], bool]:
+        """Search Apollo organizations (free tier) with placeholder contacts; returns (leads, is_mock)"""
 
         api_key = config.get('api_key', '')
         
         if not api_key or api_key.startswith('MISSING'):
             logger.warning("Apollo API key not configured, returning mock data")
-            return self._generate_mock_leads('Apollo', icp, 5)
+            return self._generate_mock_leads('Apollo', icp, MOCK_LEAD_COUNT), True
         
         try:
             headers = {
@@ -127,59 +215,56 @@ class ProspectSearchAgent(BaseAgent):
             }
             
             logger.info("Calling Apollo organizations/search (free tier)...")
-            response = requests.post(endpoint, json=search_data, headers=headers, timeout=30)
+            response = breaker_for(endpoint).call(SESSION.post, endpoint, json=search_data, headers=headers, timeout=DEFAULT_TIMEOUT)
             
-            logger.info(f"Apollo API returned status {response.status_code}")
+            logger.info("Apollo API returned status %s", response.status_code)
             
             if response.status_code == 200:
-                data = response.json()
-                leads = []
+                data = orjson.loads(response.content)
                 
                 organizations = data.get('organizations', [])
-                logger.info(f"Apollo returned {len(organizations)} organizations")
+                logger.info("Apollo returned %d organizations", len(organizations))
                 
-                for org in organizations:
-                    # Real organization data
-                    company_name = org.get('name', 'Unknown Company')
-                    domain = org.get('primary_domain', 'example.com')
-                    company_size = org.get('estimated_num_employees', 0)
-                    
-                    # Generate contact placeholder (not real person)
-                    contact_name = f"Contact at {company_name}"
-                    contact_email = f"contact@{domain}"
-                    
-                    leads.append({
-                        'company': company_name,
-                        'contact_name': contact_name,
-                        'email': contact_email,
-                        'linkedin': org.get('linkedin_url', ''),
-                        'title': 'Decision Maker',
-                        'signal': signals[0] if signals else 'Active in target market',
-                        'source': 'Apollo (Organization Data)',
-                        'company_domain': domain,
-                        'company_size': company_size,
-                        'company_linkedin': org.get('linkedin_url', ''),
-                        'company_website': org.get('website_url', ''),
-                        'company_industry': ', '.join(org.get('industries', [])[:2]) if org.get('industries') else 'Unknown'
-                    })
-                
-                return leads
+                signal = signals[0] if signals else 'Active in target market'
+                return [self._organization_to_lead(org, signal) for org in organizations], False
             else:
-                logger.warning(f"Apollo API error {response.status_code}: {response.text[:200]}")
-                return self._generate_mock_leads('Apollo', icp, 5)
+                logger.warning("Apollo API error %s: %s", response.status_code, response.text[:200])
+                return self._generate_mock_leads('Apollo', icp, MOCK_LEAD_COUNT), True
                 
         except Exception as e:
-            logger.error(f"Error calling Apollo API: {e}")
-            return self._generate_mock_leads('Apollo', icp, 5)
+            logger.error("Error calling Apollo API: %s", e)
+            return self._generate_mock_leads('Apollo', icp, MOCK_LEAD_COUNT), True
             
-    def _search_clay(self, icp: Dict, signals: List[str], config: Dict) -> List[Dict]:
-        """Search Clay API for prospects"""
+    def _organization_to_lead(self, org: Dict, signal: str) -> Dict:
+        """Build a lead from Apollo organization data with a placeholder contact"""
+        # Real organization data
+        company_name = org.get('name', 'Unknown Company')
+        domain = org.get('primary_domain', 'example.com')
+        
+        # Generate contact placeholder (not real person)
+        return {
+            'company': company_name,
+            'contact_name': f"Contact at {company_name}",
+            'email': f"contact@{domain}",
+            'linkedin': org.get('linkedin_url', ''),
+            'title': 'Decision Maker',
+            'signal': signal,
+            'source': 'Apollo (Organization Data)',
+            'company_domain': domain,
+            'company_size': org.get('estimated_num_employees', 0),
+            'company_linkedin': org.get('linkedin_url', ''),
+            'company_website': org.get('website_url', ''),
+            'company_industry': ', '.join(org.get('industries', [])[:2]) if org.get('industries') else 'Unknown'
+        }
+    
+    def _search_clay(self, icp: Dict, signals: List[str], config: Dict) -> Tuple[List[Dict], bool]:
+        """Search Clay API for prospects; returns (leads, is_mock)"""
         api_key = config.get('api_key', '')
         endpoint = config.get('endpoint', '')
         
         if not api_key or api_key.startswith('MISSING'):
             logger.warning("Clay API key not configured, returning mock data")
-            return self._generate_mock_leads('Clay', icp, 5)
+            return self._generate_mock_leads('Clay', icp, MOCK_LEAD_COUNT), True
         
         try:
             headers = {
@@ -198,74 +283,83 @@ class ProspectSearchAgent(BaseAgent):
                 'limit': 35
             }
             #limit=1 for test
-            response = requests.post(endpoint, json=search_params, headers=headers, timeout=30)
+            status_code, data = self._cached_post(endpoint, search_params, headers, config.get('cache_ttl', DEFAULT_CACHE_TTL))
             
-            if response.status_code == 200:
-                data = response.json()
-                leads = []
-                
-                for company in data.get('results', []):
-                    leads.append({
+            if status_code == 200:
+                signal = signals[0] if signals else 'general'
+                return [
+                    {
                         'company': company.get('name', ''),
                         'contact_name': company.get('primary_contact', {}).get('name', 'Unknown'),
                         'email': company.get('primary_contact', {}).get('email', ''),
                         'linkedin': company.get('linkedin_url', ''),
                         'title': company.get('primary_contact', {}).get('title', ''),
-                        'signal': signals[0] if signals else 'general',
+                        'signal': signal,
                         'source': 'Clay'
-                    })
-                
-                return leads
+                    }
+                    for company in data.get('results', ())
+                ], False
             else:
-                logger.warning(f"Clay API returned status {response.status_code}")
-                return self._generate_mock_leads('Clay', icp, 5)
+                logger.warning("Clay API returned status %s", status_code)
+                return self._generate_mock_leads('Clay', icp, MOCK_LEAD_COUNT), True
                 
         except Exception as e:
-            logger.error(f"Error calling Clay API: {e}")
-            return self._generate_mock_leads('Clay', icp, 5)
+            logger.error("Error calling Clay API: %s", e)
+            return self._generate_mock_leads('Clay', icp, MOCK_LEAD_COUNT), True
     
-    def _generate_mock_leads(self, source: str, icp: Dict, count: int) -> List[Dict]:
-        """Generate mock lead data for testing"""
-        companies = [
-            'TechCorp Solutions', 'DataDrive Inc', 'CloudScale Systems',
-            'Innovation Labs', 'Digital Ventures', 'SmartOps Co',
-            'FutureStack Inc', 'AgileWorks', 'NexGen Software', 'Quantum Analytics'
-        ]
+    def _cached_post(self, endpoint: str, payload: Dict, headers: Dict, ttl: float) -> Tuple[int, Optional[Dict]]:
+        """POST a search, serving repeat (endpoint, payload) pairs from a TTL cache
         
-        titles = ['VP of Sales', 'Head of Revenue', 'Chief Revenue Officer', 
-                  'Sales Director', 'VP Marketing']
+        Returns (status_code, data); data is None unless the call succeeded.
+        Only 200 responses are cached so failures are retried on the next run.
+        """
+        key = hashlib.sha1(endpoint.encode() + orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
         
-        signals_map = {
-            'recent_funding': 'Recent $10M Series B',
-            'hiring_for_sales': 'Hiring 5+ sales roles',
-            'tech_stack_change': 'Migrating to new CRM',
-            'expansion': 'Opening new office'
-        }
+        entry = None
+        if ttl > 0:
+            with _RESPONSE_CACHE_LOCK:
+                entry = _RESPONSE_CACHE.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            logger.debug("Search cache hit for %s", endpoint)
+            return 200, entry[1]
+        
+        # Repeated failures trip the host's breaker, so later searches fall back to mock instantly
+        response = breaker_for(endpoint).call(SESSION.post, endpoint, json=payload, headers=headers, timeout=DEFAULT_TIMEOUT)
+        if response.status_code != 200:
+            return response.status_code, None
         
-        mock_leads = []
-        for i in range(count):
-            company = companies[i % len(companies)]
-            mock_leads.append({
-                'company': company,
+        # Decode straight from the body bytes; skips requests' charset detection and stdlib json
+        data = orjson.loads(response.content)
+        if ttl > 0:
+            with _RESPONSE_CACHE_LOCK:
+                _RESPONSE_CACHE[key] = (time.monotonic() + ttl, data)
+        return 200, data
+    
+    def _generate_mock_leads(self, source: str, icp: Dict, count: int) -> List[Dict]:
+        """Generate mock lead data for testing"""
+        signal = _MOCK_SIGNALS.get(icp.get('signals', ['general'])[0] if 'signals' in icp else 'general', 'Active in target market')
+        
+        return [
+            {
+                'company': _MOCK_COMPANIES[i % len(_MOCK_COMPANIES)],
                 'contact_name': f'John Doe {i+1}',
-                'email': f'john.doe{i+1}@{company.lower().replace(" ", "")}.com',
+                'email': f'john.doe{i+1}@{_MOCK_COMPANY_SLUGS[i % len(_MOCK_COMPANIES)]}.com',
                 'linkedin': f'https://linkedin.com/in/johndoe{i+1}',
-                'title': titles[i % len(titles)],
-                'signal': signals_map.get(icp.get('signals', ['general'])[0] if 'signals' in icp else 'general', 'Active in target market'),
+                'title': _MOCK_TITLES[i % len(_MOCK_TITLES)],
+                'signal': signal,
                 'source': source
-            })
-        
-        return mock_leads
+            }
+            for i in range(count)
+        ]
     
     def _deduplicate_leads(self, leads: List[Dict]) -> List[Dict]:
-        """Remove duplicate leads based on email"""
-        seen_emails = set()
-        unique_leads = []
+        """Remove duplicate leads based on email, keeping the first occurrence"""
+        # One dict serves as both the seen-set and the ordered result
+        unique_leads = {}
         
         for lead in leads:
-            email = lead.get('email', '').lower()
-            if email and email not in seen_emails:
-                seen_emails.add(email)
-                unique_leads.append(lead)
+            email = (lead.get('email') or '').lower()
+            if email and email not in unique_leads:
+                unique_leads[email] = lead
         
-        return unique_leads
+        return list(unique_leads.values())
@@ -3,9 +3,10 @@ Response Tracker Agent - Monitors email responses and engagement
 """
 from typing import Dict, Any, List
 import logging
-import random
+import numpy as np
+import orjson
 from agents.base_agent import BaseAgent
-import requests
+from agents.http_session import DEFAULT_TIMEOUT, SESSION, breaker_for
 import os
 from dotenv import load_dotenv
 
@@ -21,7 +22,7 @@ class ResponseTrackerAgent(BaseAgent):
         """Track responses for a campaign"""
         
         campaign_id = inputs.get('campaign_id', '')
-        logger.info(f"Tracking responses for campaign {campaign_id}")
+        logger.info("Tracking responses for campaign %s", campaign_id)
         
         # In production, this would call Apollo API to get real metrics
         #responses= self._fetch_apollo_responses(campaign_id)
@@ -30,7 +31,7 @@ class ResponseTrackerAgent(BaseAgent):
         
         responses = self._generate_mock_responses(campaign_id)
         
-        logger.info(f"Tracked {len(responses)} responses")
+        logger.info("Tracked %d responses", len(responses))
         
         return {
             'responses': responses,
@@ -42,28 +43,29 @@ class ResponseTrackerAgent(BaseAgent):
     def _generate_mock_responses(self, campaign_id: str) -> List[Dict]:
         """Generate mock response data"""
         
-        # Simulate realistic email metrics
-        num_sent = random.randint(15, 20)
+        # Simulate realistic email metrics; all draws come from one RNG call
+        rng = np.random.default_rng()
+        num_sent = int(rng.integers(15, 21))
+        draws = rng.random((num_sent, 4))
         
-        responses = []
-        for i in range(num_sent):
-            opened = random.random() < 0.35  # 35% open rate
-            clicked = opened and random.random() < 0.15  # 15% click rate if opened
-            replied = clicked and random.random() < 0.25  # 25% reply rate if clicked
-            meeting_booked = replied and random.random() < 0.30  # 30% meeting rate if replied
-            
-            responses.append({
+        opened = draws[:, 0] < 0.35  # 35% open rate
+        clicked = opened & (draws[:, 1] < 0.15)  # 15% click rate if opened
+        replied = clicked & (draws[:, 2] < 0.25)  # 25% reply rate if clicked
+        meeting_booked = replied & (draws[:, 3] < 0.30)  # 30% meeting rate if replied
+        
+        return [
+            {
                 'contact_id': f'contact_{i+1}',
                 'campaign_id': campaign_id,
                 'sent': True,
-                'opened': opened,
-                'clicked': clicked,
-                'replied': replied,
-                'meeting_booked': meeting_booked,
-                'sentiment': 'positive' if replied else 'neutral'
-            })
-        
-        return responses
+                'opened': o,
+                'clicked': c,
+                'replied': r,
+                'meeting_booked': m,
+                'sentiment': 'positive' if r else 'neutral'
+            }
+            for i, (o, c, r, m) in enumerate(zip(opened.tolist(), clicked.tolist(), replied.tolist(), meeting_booked.tolist()))
+        ]
     
     def _calculate_metrics(self, responses: List[Dict]) -> Dict:
         """Calculate campaign metrics"""
@@ -72,10 +74,13 @@ class ResponseTrackerAgent(BaseAgent):
         if total == 0:
             return {}
         
-        opened = sum(1 for r in responses if r.get('opened'))
-        clicked = sum(1 for r in responses if r.get('clicked'))
-        replied = sum(1 for r in responses if r.get('replied'))
-        meetings = sum(1 for r in responses if r.get('meeting_booked'))
+        # Count all four engagement flags in a single pass
+        opened = clicked = replied = meetings = 0
+        for r in responses:
+            opened += bool(r.get('opened'))
+            clicked += bool(r.get('clicked'))
+            replied += bool(r.get('replied'))
+            meetings += bool(r.get('meeting_booked'))
         
         return {
             'total_sent': total,
@@ -101,9 +106,9 @@ class ResponseTrackerAgent(BaseAgent):
             url = f"https://api.apollo.io/v1/email_activities?campaign_id={campaign_id}"
             headers = {"Authorization": f"Bearer {api_key}"}
 
-            response = requests.get(url, headers=headers, timeout=15)
+            response = breaker_for(url).call(SESSION.get, url, headers=headers, timeout=DEFAULT_TIMEOUT)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             if "data" not in data:
                 logger.warning("Apollo API response missing 'data' key.")
@@ -125,5 +130,5 @@ class ResponseTrackerAgent(BaseAgent):
             return responses
 
         except Exception as e:
-            logger.warning(f"Apollo API fetch failed: {e}")
+            logger.warning("Apollo API fetch failed: %s", e)
             return self._generate_mock_responses(campaign_id)
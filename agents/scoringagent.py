@@ -3,11 +3,17 @@
 Scoring Agent - Scores and ranks leads based on ICP criteria
 """
 from typing import Dict, Any, List
+from operator import itemgetter
+import heapq
 import logging
+import numpy as np
 from agents.base_agent import BaseAgent
 
 logger = logging.getLogger(__name__)
 
+# Number of leads returned in top_leads
+TOP_LEADS_COUNT = 10
+
 class ScoringAgent(BaseAgent):
     """Agent for scoring and ranking leads"""
     
@@ -20,24 +26,37 @@ class ScoringAgent(BaseAgent):
         enriched_leads = inputs.get('enriched_leads', [])
         scoring_criteria = inputs.get('scoring_criteria', self._default_scoring_criteria())
         
-        logger.info(f"Scoring {len(enriched_leads)} leads")
+        logger.info("Scoring %d leads", len(enriched_leads))
+        
+        scores = self._calculate_scores(enriched_leads, scoring_criteria)
+        grades = self._assign_grades(scores)
         
         scored_leads = []
-        for lead in enriched_leads:
-            score = self._calculate_score(lead, scoring_criteria)
+        for lead, score, grade in zip(enriched_leads, scores.tolist(), grades.tolist()):
             lead['score'] = score
-            lead['grade'] = self._assign_grade(score)
+            lead['grade'] = grade
             scored_leads.append(lead)
         
-        # Rank leads by score
-        ranked_leads = sorted(scored_leads, key=lambda x: x['score'], reverse=True)
+        # Top-K selection is O(N log K); ties keep input order, same as slicing a sorted list
+        top_leads = heapq.nlargest(TOP_LEADS_COUNT, scored_leads, key=itemgetter('score'))
+        
+        # The full ranking is only needed when a consumer walks the list in score order
+        # (outreach content does); steps that don't can set rank_all to false
+        if inputs.get('rank_all', True):
+            order = np.argsort(-scores, kind='stable')
+            ranked_leads = [scored_leads[i] for i in order.tolist()]
+            logger.info("Ranked %d leads", len(ranked_leads))
+        else:
+            ranked_leads = scored_leads
         
-        logger.info(f"Ranked {len(ranked_leads)} leads")
+        # Per-grade totals so summaries don't have to rescan ranked_leads
+        grade_labels, grade_totals = np.unique(grades, return_counts=True)
         
         return {
             'ranked_leads': ranked_leads,
-            'top_leads': ranked_leads[:10],
-            'average_score': sum(l['score'] for l in ranked_leads) / len(ranked_leads) if ranked_leads else 0,
+            'top_leads': top_leads,
+            'average_score': float(scores.mean()) if ranked_leads else 0,
+            'grade_counts': dict(zip(grade_labels.tolist(), grade_totals.tolist())),
             'reasoning': reasoning
         }
     
@@ -53,38 +72,40 @@ class ScoringAgent(BaseAgent):
             'preferred_technologies': ['Salesforce', 'HubSpot']
         }
     
-    def _calculate_score(self, lead: Dict, criteria: Dict) -> float:
-        """Calculate lead score based on criteria"""
-        score = 0.0
+    def _calculate_scores(self, leads: List[Dict], criteria: Dict) -> np.ndarray:
+        """Calculate scores for all leads at once, one array per criterion"""
+        count = len(leads)
+        preferred_seniority = frozenset(criteria.get('preferred_seniority', []))
+        preferred_sizes = frozenset(criteria.get('preferred_company_sizes', []))
+        preferred_tech = frozenset(criteria.get('preferred_technologies', []))
         
-        # Seniority score
-        if lead.get('seniority') in criteria.get('preferred_seniority', []):
-            score += criteria.get('seniority_weight', 0.3) * 100
+        seniority_match = np.fromiter((l.get('seniority') in preferred_seniority for l in leads), dtype=np.bool_, count=count)
+        size_match = np.fromiter((l.get('company_size') in preferred_sizes for l in leads), dtype=np.bool_, count=count)
+        has_signal = np.fromiter((bool(l.get('signal')) for l in leads), dtype=np.bool_, count=count)
         
-        # Company size score
-        if lead.get('company_size') in criteria.get('preferred_company_sizes', []):
-            score += criteria.get('company_size_weight', 0.2) * 100
+        # Seniority, company size and signal (always give some points for having a signal)
+        # are all-or-nothing; terms are added in the same order as the per-lead formula
+        scores = seniority_match * (criteria.get('seniority_weight', 0.3) * 100)
+        scores = scores + size_match * (criteria.get('company_size_weight', 0.2) * 100)
         
-        # Tech stack score
-        lead_tech = set(lead.get('technologies', []))
-        preferred_tech = set(criteria.get('preferred_technologies', []))
-        tech_overlap = len(lead_tech.intersection(preferred_tech))
-        if tech_overlap > 0:
-            score += criteria.get('tech_stack_weight', 0.2) * 100 * (tech_overlap / len(preferred_tech))
+        # Tech stack score, proportional to how many preferred technologies the lead uses
+        if preferred_tech:
+            tech_overlap = np.fromiter(
+                (self._tech_overlap(l.get('technologies', ()), preferred_tech) for l in leads), dtype=np.int32, count=count
+            )
+            scores = scores + criteria.get('tech_stack_weight', 0.2) * 100 * (tech_overlap / len(preferred_tech))
         
-        # Signal score (always give some points for having a signal)
-        if lead.get('signal'):
-            score += criteria.get('signal_weight', 0.3) * 100
+        scores = scores + has_signal * (criteria.get('signal_weight', 0.3) * 100)
         
-        return round(score, 2)
+        return np.round(scores, 2)
     
-    def _assign_grade(self, score: float) -> str:
-        """Assign letter grade based on score"""
-        if score >= 80:
-            return 'A'
-        elif score >= 60:
-            return 'B'
-        elif score >= 40:
-            return 'C'
-        else:
-            return 'D'
\ No newline at end of file
+    def _tech_overlap(self, technologies, preferred_tech: frozenset) -> int:
+        """Number of distinct preferred technologies a lead uses"""
+        # isdisjoint allocates nothing, so leads with no overlap never build a set
+        if preferred_tech.isdisjoint(technologies):
+            return 0
+        return len(preferred_tech.intersection(technologies))
+    
+    def _assign_grades(self, scores: np.ndarray) -> np.ndarray:
+        """Assign letter grades based on score"""
+        return np.select([scores >= 80, scores >= 60, scores >= 40], ['A', 'B', 'C'], default='D')
@@ -0,0 +1,90 @@
+"""
+Semantic Cache - Reuses results for near-duplicate queries via embedding similarity
+"""
+from typing import Any, Optional
+import hashlib
+import logging
+import threading
+import time
+import orjson
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = ".workflow_cache/semantic"
+
+# Cosine similarity a stored query must reach to count as a hit
+DEFAULT_SIMILARITY_THRESHOLD = 0.92
+
+# Cached results older than this (seconds) are ignored
+DEFAULT_CACHE_TTL = 24 * 60 * 60
+
+
+class SemanticCache:
+    """Embedding-keyed cache backed by a persistent Chroma collection
+
+    Queries are embedded with Chroma's default local embedder (all-MiniLM-L6-v2), so
+    paraphrased queries land close to each other; pass embedding_function to use another
+    model. Entries are partitioned by namespace.
+    Any store or embedding error is logged and treated as a miss.
+    """
+
+    def __init__(self, collection_name: str, path: str = DEFAULT_CACHE_DIR,
+                 threshold: float = DEFAULT_SIMILARITY_THRESHOLD, ttl: float = DEFAULT_CACHE_TTL,
+                 embedding_function: Any = None):
+        self.collection_name = collection_name
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.embedding_function = embedding_function
+        self._collection = None
+        self._lock = threading.Lock()
+
+    def _get_collection(self):
+        """Open the collection on first use; chromadb is slow to import, so it is loaded lazily"""
+        with self._lock:
+            if self._collection is None:
+                import chromadb
+                client = chromadb.PersistentClient(path=self.path)
+                kwargs = {'embedding_function': self.embedding_function} if self.embedding_function else {}
+                self._collection = client.get_or_create_collection(
+                    self.collection_name, metadata={"hnsw:space": "cosine"}, **kwargs
+                )
+            return self._collection
+
+    def get(self, namespace: str, query: str) -> Optional[Any]:
+        """Return the value stored for the most similar query, or None on a miss"""
+        try:
+            result = self._get_collection().query(
+                query_texts=[query], n_results=1, where={"namespace": namespace}
+            )
+        except Exception as e:
+            logger.warning("Semantic cache lookup failed: %s", e)
+            return None
+
+        if not result['ids'][0]:
+            return None
+
+        # Cosine space: distance = 1 - similarity
+        similarity = 1 - result['distances'][0][0]
+        metadata = result['metadatas'][0][0]
+        if similarity < self.threshold or time.time() - metadata['created_at'] > self.ttl:
+            return None
+
+        logger.info("Semantic cache hit (similarity %.3f) in namespace %s", similarity, namespace)
+        return orjson.loads(metadata['value'])
+
+    def set(self, namespace: str, query: str, value: Any):
+        """Store a value under the query's embedding, replacing any entry for the same query"""
+        entry_id = hashlib.sha1(f"{namespace}\0{query}".encode()).hexdigest()
+        try:
+            self._get_collection().upsert(
+                ids=[entry_id],
+                documents=[query],
+                metadatas=[{
+                    'namespace': namespace,
+                    'created_at': time.time(),
+                    'value': orjson.dumps(value).decode()
+                }]
+            )
+        except Exception as e:
+            logger.warning("Semantic cache write failed: %s", e)
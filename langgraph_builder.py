@@ -1,28 +1,64 @@
 """
 LangGraph Builder - Dynamically constructs and executes agent workflows from JSON config
 """
-import json
+import asyncio
+import importlib
+import operator
 import os
-from typing import Dict, List, Any, TypedDict
+import re
+import orjson
+from functools import partial
+from typing import Annotated, Callable, Dict, List, Any, Tuple, TypedDict
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
+from agents.base_agent import BaseAgent
 import logging
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
 logger = logging.getLogger(__name__)
 
+# {{ENV_VAR}} placeholders in tool configs
+_ENV_RE = re.compile(r'\{\{([A-Z_]+)\}\}')
+
+
+def _expand_env(text: str) -> str:
+    """Substitute every {{ENV_VAR}} in a string in one scan; unset vars become MISSING_<VAR>"""
+    # Most config strings (endpoints, descriptions) have no placeholder at all
+    if '{{' not in text:
+        return text
+    get = os.environ.get
+    return _ENV_RE.sub(lambda match: get(match.group(1), f"MISSING_{match.group(1)}"), text)
+
+
+# History entries keep at most this much of a step's output repr
+HISTORY_SUMMARY_MAXLEN = 2048
+
+
+def _summarize(value: Any, maxlen: int = HISTORY_SUMMARY_MAXLEN) -> str:
+    """Bounded repr for history entries; the full output lives in state['data']"""
+    text = repr(value)
+    if len(text) <= maxlen:
+        return text
+    return f"{text[:maxlen]}...[{len(text)} chars]"
+
+
 class WorkflowState(TypedDict):
-    """State object that gets passed between nodes"""
+    """State object that gets passed between nodes
+    
+    Nodes return only what they changed; LangGraph merges data by key and
+    appends errors/history, so no node copies or mutates the full state.
+    """
     workflow_name: str
     current_step: str
-    data: Dict[str, Any]
-    errors: List[str]
-    history: List[Dict[str, Any]]
+    data: Annotated[Dict[str, Any], operator.or_]
+    errors: Annotated[List[str], operator.add]
+    history: Annotated[List[Dict[str, Any]], operator.add]
 
 class LangGraphBuilder:
     """Builds and executes LangGraph workflows from JSON configuration"""
@@ -32,6 +68,10 @@ class LangGraphBuilder:
         self.workflow_config = None
         self.graph = None
         self.agents = {}
+        # Agent name -> class (or generic BaseAgent factory), resolved once in build_graph
+        self._agent_classes: Dict[str, Callable[..., BaseAgent]] = {}
+        # The client retries rate-limited (429) calls with exponential backoff,
+        # so agents never need to pre-emptively sleep before invoking it
         self.llm = ChatGoogleGenerativeAI(
             model="gemini-2.5-flash",
             temperature=0.7,
@@ -41,16 +81,16 @@ class LangGraphBuilder:
     def load_workflow(self) -> Dict:
         """Load and validate workflow JSON"""
         try:
-            with open(self.workflow_path, 'r') as f:
-                self.workflow_config = json.load(f)
-            logger.info(f"Loaded workflow: {self.workflow_config.get('workflow_name')}")
+            with open(self.workflow_path, 'rb') as f:
+                self.workflow_config = orjson.loads(f.read())
+            logger.info("Loaded workflow: %s", self.workflow_config.get('workflow_name'))
             self._validate_workflow()
             return self.workflow_config
         except FileNotFoundError:
-            logger.error(f"Workflow file not found: {self.workflow_path}")
+            logger.error("Workflow file not found: %s", self.workflow_path)
             raise
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in workflow file: {e}")
+        except orjson.JSONDecodeError as e:
+            logger.error("Invalid JSON in workflow file: %s", e)
             raise
     
     def _validate_workflow(self):
@@ -65,88 +105,88 @@ class LangGraphBuilder:
         
         logger.info("Workflow validation passed")
     
-    def _resolve_env_variables(self, config: Dict) -> Dict:
+    def _resolve_env_variables(self, config: Any) -> Any:
         """Replace {{ENV_VAR}} placeholders with actual values"""
-        config_str = json.dumps(config)
-        
-        # Find all {{VAR}} patterns and replace
-        import re
-        pattern = r'\{\{([A-Z_]+)\}\}'
-        matches = re.findall(pattern, config_str)
-        
-        for var in matches:
-            env_value = os.getenv(var, f"MISSING_{var}")
-            config_str = config_str.replace(f"{{{{{var}}}}}", env_value)
-        
-        return json.loads(config_str)
+        # Walk the config and substitute in string leaves only; no JSON round-trip
+        if isinstance(config, dict):
+            return {key: self._resolve_env_variables(value) for key, value in config.items()}
+        if isinstance(config, list):
+            return [self._resolve_env_variables(value) for value in config]
+        if isinstance(config, str):
+            return _expand_env(config)
+        return config
     
-    def _load_agent(self, agent_name: str):
-        """Dynamically import agent class"""
+    def _resolve_agent_class(self, agent_name: str) -> Callable[..., BaseAgent]:
+        """Import the agent class for a step, e.g. agents.scoringagent.ScoringAgent"""
         try:
-            module_path = f"agents.{agent_name.lower()}"
-            #dynamic import - from agents import xxxagent as module
-            module = __import__(module_path, fromlist=[agent_name])
-            #from agents.xxxagent import xxxAgent
-            agent_class = getattr(module, agent_name)
-            return agent_class(llm=self.llm)
+            module = importlib.import_module(f"agents.{agent_name.lower()}")
+            return getattr(module, agent_name)
         except (ImportError, AttributeError) as e:
-            logger.error(f"Failed to load agent {agent_name}: {e}")
-            # Return a generic agent wrapper
-            from agents.base_agent import BaseAgent
-            return BaseAgent(agent_name, self.llm)
+            logger.error("Failed to load agent %s: %s", agent_name, e)
+            # Fall back to a generic agent wrapper
+            return partial(BaseAgent, agent_name)
     
-    def _resolve_inputs(self, inputs: Dict, state: WorkflowState) -> Dict:
-        """Resolve input references like {{step.output.field}}"""
-        resolved = {}
+    def _load_agent(self, agent_name: str):
+        """Instantiate an agent from the registry built by build_graph"""
+        return self._agent_classes[agent_name](llm=self.llm)
+    
+    def _compile_inputs(self, inputs: Dict) -> Dict[str, Tuple[str, Any, str]]:
+        """Pre-parse input references like {{step.output.field}} once per step
+        
+        Each input becomes (source, payload, ref_path): source is 'config' or 'state'
+        with the reference split into a path tuple, or 'value' for a literal.
+        """
+        compiled = {}
         
         for key, value in inputs.items():
             if isinstance(value, str) and value.startswith("{{") and value.endswith("}}"):
                 # Extract reference path
                 ref_path = value[2:-2].strip()
-                parts = ref_path.split('.')
-                # Check if it's a config reference
-                if parts[0] == 'config':
-                    # Look in workflow_config instead of state
-                    current = self.workflow_config
-                    try:
-                        for part in parts:
-                            current = current[part]
-                        resolved[key] = current
-                    except (KeyError, TypeError):
-                        logger.warning(f"Could not resolve config reference: {ref_path}")
-                        resolved[key] = None
-                else:
-                    # Navigate through state data
-                    current = state['data']
-                    try:
-                        for part in parts:
-                            current = current[part]
-                        resolved[key] = current
-                    except (KeyError, TypeError):
-                        logger.warning(f"Could not resolve reference: {ref_path}")
-                        resolved[key] = None
-                """# Navigate through state data
-                current = state['data']
-                try:
-                    for part in parts:
-                        current = current[part]
-                    resolved[key] = current
-                except (KeyError, TypeError):
-                    logger.warning(f"Could not resolve reference: {ref_path}")
-                    resolved[key] = None"""
+                parts = tuple(ref_path.split('.'))
+                # Config references look in workflow_config instead of state
+                source = 'config' if parts[0] == 'config' else 'state'
+                compiled[key] = (source, parts, ref_path)
             else:
-                resolved[key] = value
+                compiled[key] = ('value', value, '')
+        
+        return compiled
+    
+    def _resolve_inputs(self, compiled_inputs: Dict[str, Tuple[str, Any, str]], state: WorkflowState) -> Dict:
+        """Resolve pre-parsed input references against the config or state data"""
+        resolved = {}
+        
+        for key, (source, payload, ref_path) in compiled_inputs.items():
+            if source == 'value':
+                resolved[key] = payload
+                continue
+            
+            current = self.workflow_config if source == 'config' else state['data']
+            try:
+                for part in payload:
+                    current = current[part]
+                resolved[key] = current
+            except (KeyError, TypeError):
+                if source == 'config':
+                    logger.warning("Could not resolve config reference: %s", ref_path)
+                else:
+                    logger.warning("Could not resolve reference: %s", ref_path)
+                resolved[key] = None
         
         return resolved
     
-    def _create_node_function(self, step_config: Dict):
-        """Create a node function for a workflow step"""
+    def _create_node_function(self, step_config: Dict, resolved_tools: List[Dict]) -> RunnableLambda:
+        """Create a node runnable for a workflow step (sync and async entry points)
+        
+        Tool configs arrive with env placeholders already resolved and input references
+        are parsed here, so each invocation only walks the state.
+        """
+        compiled_inputs = self._compile_inputs(step_config.get('inputs', {}))
         
-        def node_function(state: WorkflowState) -> WorkflowState:
+        def node_function(state: WorkflowState) -> Dict[str, Any]:
             step_id = step_config['id']
             agent_name = step_config['agent']
             
-            logger.info(f"Executing node: {step_id} ({agent_name})")
+            logger.info("Executing node: %s (%s)", step_id, agent_name)
             
             # Load agent if not already loaded
             if agent_name not in self.agents:
@@ -155,38 +195,42 @@ class LangGraphBuilder:
             agent = self.agents[agent_name]
             
             # Resolve input references
-            inputs = self._resolve_inputs(step_config.get('inputs', {}), state)
-            
-            # Resolve tool configurations
-            tools_config = self._resolve_env_variables({'tools': step_config.get('tools', [])})
+            inputs = self._resolve_inputs(compiled_inputs, state)
             
             # Execute agent
             try:
                 result = agent.execute(
                     inputs=inputs,
                     instructions=step_config.get('instructions', ''),
-                    tools=tools_config['tools']
+                    tools=resolved_tools
                 )
                 
-                # Update state
-                state['data'][step_id] = {'output': result}
-                state['current_step'] = step_id
-                state['history'].append({
-                    'step': step_id,
-                    'agent': agent_name,
-                    'inputs': inputs,
-                    'output': result
-                })
+                logger.info("Node %s completed successfully", step_id)
                 
-                logger.info(f"Node {step_id} completed successfully")
+                # Return the state update; the reducers merge it into the workflow state
+                return {
+                    'data': {step_id: {'output': result}},
+                    'current_step': step_id,
+                    # Inputs often carry upstream lead lists, so history keeps only a
+                    # bounded summary instead of another copy of every step's data
+                    'history': [{
+                        'step': step_id,
+                        'agent': agent_name,
+                        'inputs_keys': list(inputs),
+                        'output_summary': _summarize(result)
+                    }]
+                }
                 
             except Exception as e:
-                logger.error(f"Error in node {step_id}: {e}")
-                state['errors'].append(f"{step_id}: {str(e)}")
-            
-            return state
+                logger.error("Error in node %s: %s", step_id, e)
+                return {'errors': [f"{step_id}: {str(e)}"]}
         
-        return node_function
+        async def async_node_function(state: WorkflowState) -> Dict[str, Any]:
+            # Agents do blocking I/O, so run them off the event loop; other coroutines
+            # (e.g. concurrent workflow runs) keep making progress meanwhile
+            return await asyncio.to_thread(node_function, state)
+        
+        return RunnableLambda(node_function, afunc=async_node_function, name=step_config['id'])
     
     def build_graph(self) -> StateGraph:
         """Build LangGraph from workflow configuration"""
@@ -199,7 +243,13 @@ class LangGraphBuilder:
         # Add nodes
         steps = self.workflow_config['steps']
         for step in steps:
-            node_func = self._create_node_function(step)
+            # Resolve agent classes up front so a missing agent shows up at build time
+            if step['agent'] not in self._agent_classes:
+                self._agent_classes[step['agent']] = self._resolve_agent_class(step['agent'])
+            
+            # Env vars are static for the run, so tool configs are resolved once here
+            resolved_tools = self._resolve_env_variables(step.get('tools', []))
+            node_func = self._create_node_function(step, resolved_tools)
             workflow.add_node(step['id'], node_func)
         
         # Add edges (sequential flow)
@@ -218,34 +268,52 @@ class LangGraphBuilder:
         
         return self.graph
     
-    def execute(self, initial_data: Dict = None) -> Dict:
-        """Execute the workflow"""
-        if not self.graph:
-            self.build_graph()
-        
-        # Initialize state
-        initial_state: WorkflowState = {
+    def _initial_state(self, initial_data: Dict = None) -> WorkflowState:
+        """Build the state the graph starts from"""
+        return {
             'workflow_name': self.workflow_config['workflow_name'],
             'current_step': '',
             'data': initial_data or {},
             'errors': [],
             'history': []
         }
-        
-        logger.info(f"Starting workflow execution: {self.workflow_config['workflow_name']}")
-        
-        # Run graph
-        final_state = self.graph.invoke(initial_state)
-        
-        logger.info("Workflow execution completed")
-        
-        # Return results
+    
+    def _build_result(self, final_state: WorkflowState) -> Dict:
+        """Shape the final graph state into the workflow result"""
         return {
             'success': len(final_state['errors']) == 0,
             'data': final_state['data'],
             'errors': final_state['errors'],
             'history': final_state['history']
         }
+    
+    def execute(self, initial_data: Dict = None) -> Dict:
+        """Execute the workflow"""
+        if not self.graph:
+            self.build_graph()
+        
+        logger.info("Starting workflow execution: %s", self.workflow_config['workflow_name'])
+        
+        # Run graph
+        final_state = self.graph.invoke(self._initial_state(initial_data))
+        
+        logger.info("Workflow execution completed")
+        
+        return self._build_result(final_state)
+    
+    async def aexecute(self, initial_data: Dict = None) -> Dict:
+        """Execute the workflow without blocking the caller's event loop"""
+        if not self.graph:
+            self.build_graph()
+        
+        logger.info("Starting async workflow execution: %s", self.workflow_config['workflow_name'])
+        
+        # Run graph
+        final_state = await self.graph.ainvoke(self._initial_state(initial_data))
+        
+        logger.info("Workflow execution completed")
+        
+        return self._build_result(final_state)
 
 def main():
     """Main execution function"""
@@ -272,8 +340,8 @@ def main():
             print(f"  - {error}")
     
     # Save results
-    with open('workflow_results.json', 'w') as f:
-        json.dump(result, f, indent=2)
+    with open('workflow_results.json', 'wb') as f:
+        f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     
     print("\nResults saved to workflow_results.json")
 
@@ -0,0 +1,10 @@
+"""
+Shared test setup - makes the repo importable and keeps tests off real services
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# LangGraphBuilder constructs the Gemini client eagerly; tests swap in a fake LLM
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
@@ -0,0 +1,116 @@
+"""
+Tests for the per-host circuit breaker
+"""
+import pytest
+import requests
+from agents import http_session
+from agents.http_session import CircuitBreaker, CircuitOpenError, breaker_for
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic for the breaker's reset timeout"""
+    now = [1000.0]
+    monkeypatch.setattr(http_session.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def fail():
+    raise requests.ConnectionError("down")
+
+
+def response(status_code):
+    resp = requests.Response()
+    resp.status_code = status_code
+    return resp
+
+
+def test_opens_after_fail_max_consecutive_failures(clock):
+    breaker = CircuitBreaker("api.test", fail_max=3, reset_timeout=60)
+
+    for _ in range(3):
+        with pytest.raises(requests.ConnectionError):
+            breaker.call(fail)
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, 'called')
+    assert calls == []
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("api.test", fail_max=2)
+
+    with pytest.raises(requests.ConnectionError):
+        breaker.call(fail)
+    assert breaker.call(lambda: 'ok') == 'ok'
+    with pytest.raises(requests.ConnectionError):
+        breaker.call(fail)
+
+    # Only one failure since the last success, so the circuit is still closed
+    assert breaker.call(lambda: 'ok') == 'ok'
+
+
+def test_server_errors_count_as_failures(clock):
+    breaker = CircuitBreaker("api.test", fail_max=2)
+
+    assert breaker.call(response, 503).status_code == 503
+    assert breaker.call(response, 500).status_code == 500
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(response, 200)
+
+
+def test_client_errors_do_not_trip_the_breaker(clock):
+    breaker = CircuitBreaker("api.test", fail_max=1)
+
+    breaker.call(response, 404)
+
+    assert breaker.call(response, 200).status_code == 200
+
+
+def test_half_open_trial_success_closes_circuit(clock):
+    breaker = CircuitBreaker("api.test", fail_max=1, reset_timeout=60)
+    with pytest.raises(requests.ConnectionError):
+        breaker.call(fail)
+
+    clock[0] += 61
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.call(lambda: 'ok again') == 'ok again'
+
+
+def test_half_open_trial_failure_reopens_circuit(clock):
+    breaker = CircuitBreaker("api.test", fail_max=1, reset_timeout=60)
+    with pytest.raises(requests.ConnectionError):
+        breaker.call(fail)
+
+    clock[0] += 61
+    with pytest.raises(requests.ConnectionError):
+        breaker.call(fail)
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 'ok')
+
+
+def test_half_open_lets_only_one_trial_through(clock):
+    breaker = CircuitBreaker("api.test", fail_max=1, reset_timeout=60)
+    with pytest.raises(requests.ConnectionError):
+        breaker.call(fail)
+
+    clock[0] += 61
+    # The trial call restarts the timeout, so a concurrent caller still fails fast
+    trial_started = []
+
+    def slow_trial():
+        trial_started.append(True)
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: 'concurrent')
+        return 'trial'
+
+    assert breaker.call(slow_trial) == 'trial'
+    assert trial_started == [True]
+
+
+def test_breaker_for_shares_one_breaker_per_host():
+    assert breaker_for("https://api.apollo.io/v1/a") is breaker_for("https://api.apollo.io/v1/b")
+    assert breaker_for("https://api.apollo.io/v1/a") is not breaker_for("https://api.clay.com/v1/a")
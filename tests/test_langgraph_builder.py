@@ -0,0 +1,81 @@
+"""
+Tests for LangGraphBuilder state merging
+"""
+import orjson
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from agents.base_agent import BaseAgent
+from langgraph_builder import LangGraphBuilder
+
+
+class EchoAgent(BaseAgent):
+    """Returns its inputs so tests can see what each step resolved"""
+
+    def __init__(self, llm):
+        super().__init__("EchoAgent", llm)
+
+    def _act(self, reasoning, inputs, tools):
+        return {'status': 'completed', 'inputs': inputs}
+
+
+class FailingAgent(BaseAgent):
+    def __init__(self, llm):
+        super().__init__("FailingAgent", llm)
+
+    def _act(self, reasoning, inputs, tools):
+        raise RuntimeError("boom")
+
+
+@pytest.fixture
+def make_builder(tmp_path):
+    def make(steps):
+        workflow_path = tmp_path / "workflow.json"
+        workflow_path.write_bytes(orjson.dumps({'workflow_name': 'TestWorkflow', 'steps': steps}))
+        builder = LangGraphBuilder(str(workflow_path))
+        builder.llm = FakeListChatModel(responses=["reasoning"])
+        builder.build_graph()
+        # Agents are instantiated lazily from this registry, so tests can swap them in after build
+        builder._agent_classes.update({'EchoAgent': EchoAgent, 'FailingAgent': FailingAgent})
+        return builder
+    return make
+
+
+def test_step_outputs_merge_into_initial_data(make_builder):
+    builder = make_builder([
+        {'id': 'first', 'agent': 'EchoAgent', 'inputs': {'seed': '{{seed}}'}},
+        {'id': 'second', 'agent': 'EchoAgent', 'inputs': {'upstream': '{{first.output.status}}'}},
+    ])
+
+    result = builder.execute(initial_data={'seed': 42})
+
+    assert result['success']
+    assert result['data']['seed'] == 42
+    assert result['data']['first']['output']['inputs'] == {'seed': 42}
+    assert result['data']['second']['output']['inputs'] == {'upstream': 'completed'}
+    assert [entry['step'] for entry in result['history']] == ['first', 'second']
+    assert result['errors'] == []
+
+
+def test_failed_step_appends_error_and_keeps_earlier_data(make_builder):
+    builder = make_builder([
+        {'id': 'first', 'agent': 'EchoAgent', 'inputs': {}},
+        {'id': 'broken', 'agent': 'FailingAgent', 'inputs': {}},
+        {'id': 'last', 'agent': 'EchoAgent', 'inputs': {}},
+    ])
+
+    result = builder.execute(initial_data={'seed': 1})
+
+    assert not result['success']
+    assert result['errors'] == ["broken: boom"]
+    assert set(result['data']) == {'seed', 'first', 'last'}
+    assert [entry['step'] for entry in result['history']] == ['first', 'last']
+
+
+def test_history_entries_are_bounded_summaries(make_builder):
+    builder = make_builder([{'id': 'only', 'agent': 'EchoAgent', 'inputs': {'payload': 'x' * 10000}}])
+
+    entry = builder.execute()['history'][0]
+
+    assert entry['agent'] == 'EchoAgent'
+    assert entry['inputs_keys'] == ['payload']
+    assert len(entry['output_summary']) < 2100
@@ -0,0 +1,83 @@
+"""
+Tests for OutreachContentAgent's message template cache
+"""
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from agents import outreachcontentagent
+from agents.outreachcontentagent import OutreachContentAgent
+
+LEAD = {
+    'contact_name': 'Al Smith',
+    'company': 'Acme',
+    'title': 'VP Sales',
+    'seniority': 'Executive',
+    'company_industry': 'SaaS',
+    'signal': 'Hiring 5+ sales roles',
+    'technologies': ['Salesforce', 'HubSpot'],
+    'grade': 'A'
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(outreachcontentagent, '_MESSAGE_CACHE', {})
+
+
+def cache_key(lead):
+    return OutreachContentAgent(None)._message_cache_key(lead, 'SDR', 'friendly')
+
+
+def test_cache_key_ignores_name_and_company():
+    assert cache_key(LEAD) == cache_key(dict(LEAD, contact_name='Bob Jones', company='Globex'))
+
+
+@pytest.mark.parametrize('field, value', [
+    ('title', 'CTO'),
+    ('technologies', ['Snowflake']),
+    ('signal', 'Recent $10M Series B'),
+    ('company_industry', 'Fintech'),
+])
+def test_cache_key_separates_leads_with_different_prompts(field, value):
+    assert cache_key(LEAD) != cache_key(dict(LEAD, **{field: value}))
+
+
+def test_cache_key_handles_missing_fields():
+    assert cache_key({'title': None, 'technologies': None, 'signal': None}) == cache_key({})
+
+
+def test_render_template_fills_placeholders_only():
+    template = {
+        'subject': "Hi {first_name}, Also for {company}",
+        'body': "Dear {contact_name}, Alpha plan {unknown} {"
+    }
+
+    rendered = OutreachContentAgent(None)._render_template(template, dict(LEAD, contact_name='Bob Jones', company='Globex'))
+
+    assert rendered == {
+        'subject': "Hi Bob, Also for Globex",
+        'body': "Dear Bob Jones, Alpha plan {unknown} {"
+    }
+
+
+def test_render_template_defaults_missing_identity():
+    template = {'subject': "{first_name} at {company}", 'body': "Hi {contact_name}"}
+
+    rendered = OutreachContentAgent(None)._render_template(template, {'contact_name': None, 'company': None})
+
+    assert rendered == {'subject': "there at your company", 'body': "Hi there"}
+
+
+def test_cached_template_is_reused_for_matching_leads():
+    response = '{"subject": "Quick idea for {company}", "body": "Hi {first_name}, ..."}'
+    llm = FakeListChatModel(responses=[response])
+    agent = OutreachContentAgent(llm)
+    leads = [LEAD, dict(LEAD, contact_name='Bob Jones', company='Globex')]
+
+    messages = agent._generate_messages(leads, 'SDR', 'friendly')
+    # The second run is served entirely from the cache
+    llm.responses = ['not json']
+    repeat = agent._generate_messages(leads, 'SDR', 'friendly')
+
+    assert [m['subject'] for m in messages] == ["Quick idea for Acme", "Quick idea for Globex"]
+    assert [m['body'] for m in messages] == ["Hi Al, ...", "Hi Bob, ..."]
+    assert repeat == messages
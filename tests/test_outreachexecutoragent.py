@@ -0,0 +1,109 @@
+"""
+Tests for OutreachExecutorAgent's Apollo batch send
+"""
+import orjson
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from agents.outreachexecutoragent import OutreachExecutorAgent
+
+BATCH_ENDPOINT = "https://api.apollo.test/v1/emails/batch"
+SEND_ENDPOINT = "https://api.apollo.test/v1/emails"
+APOLLO_TOOL = {
+    'name': 'ApolloAPI',
+    'config': {'api_key': 'key', 'endpoint': SEND_ENDPOINT, 'batch_endpoint': BATCH_ENDPOINT}
+}
+MESSAGES = [{'email': f'lead{i}@example.com', 'lead': f'Lead {i}', 'company': 'Acme'} for i in range(3)]
+
+
+def response(status_code, body=None):
+    resp = requests.Response()
+    resp.status_code = status_code
+    resp._content = orjson.dumps(body) if body is not None else b''
+    return resp
+
+
+def _raise(error):
+    raise error
+
+
+@pytest.fixture
+def post(mocker):
+    return mocker.patch('agents.outreachexecutoragent.SESSION.post')
+
+
+def sent_to(post, url):
+    """Recipients of every call made to url"""
+    recipients = []
+    for call in post.call_args_list:
+        if call.args[0] != url:
+            continue
+        payload = call.kwargs['json']
+        if 'emails' in payload:
+            recipients.extend(email['to_email'] for email in payload['emails'])
+        else:
+            recipients.append(payload['to_email'])
+    return recipients
+
+
+def test_only_rejected_recipients_are_resent(post):
+    post.side_effect = lambda url, **kwargs: (
+        response(200, {'results': [{'status': 'sent'}, {'status': 'rejected', 'error': 'bounced'}, {'status': 'sent'}]})
+        if url == BATCH_ENDPOINT else response(200)
+    )
+
+    statuses = OutreachExecutorAgent(None)._send_email_apollo_batch(MESSAGES, APOLLO_TOOL, 'campaign_1')
+
+    assert [s['status'] for s in statuses] == ['sent', 'sent', 'sent']
+    assert [s['email'] for s in statuses] == [m['email'] for m in MESSAGES]
+    assert sent_to(post, SEND_ENDPOINT) == ['lead1@example.com']
+
+
+def test_rejected_recipient_that_fails_again_is_reported_failed(post):
+    post.side_effect = lambda url, **kwargs: (
+        response(200, {'results': [{'status': 'sent'}, {'status': 'rejected'}, {'status': 'sent'}]})
+        if url == BATCH_ENDPOINT else response(422)
+    )
+
+    statuses = OutreachExecutorAgent(None)._send_email_apollo_batch(MESSAGES, APOLLO_TOOL, 'campaign_1')
+
+    assert [s['status'] for s in statuses] == ['sent', 'failed', 'sent']
+
+
+def test_connect_failure_falls_back_to_single_sends(post):
+    # requests wraps urllib3's MaxRetryError, whose reason says the connection never opened
+    refused = requests.ConnectionError(MaxRetryError(None, BATCH_ENDPOINT, NewConnectionError(None, "connection refused")))
+    post.side_effect = lambda url, **kwargs: _raise(refused) if url == BATCH_ENDPOINT else response(200)
+
+    statuses = OutreachExecutorAgent(None)._send_email_apollo_batch(MESSAGES, APOLLO_TOOL, 'campaign_1')
+
+    assert [s['status'] for s in statuses] == ['sent', 'sent', 'sent']
+    assert sent_to(post, SEND_ENDPOINT) == [m['email'] for m in MESSAGES]
+
+
+def test_read_timeout_is_not_retried(post):
+    post.side_effect = requests.ReadTimeout("read timed out")
+
+    statuses = OutreachExecutorAgent(None)._send_email_apollo_batch(MESSAGES, APOLLO_TOOL, 'campaign_1')
+
+    assert [s['status'] for s in statuses] == ['unknown'] * 3
+    assert post.call_count == 1
+
+
+def test_unreadable_success_response_is_not_retried(post):
+    post.return_value = response(200, {'results': [{'status': 'sent'}]})
+
+    statuses = OutreachExecutorAgent(None)._send_email_apollo_batch(MESSAGES, APOLLO_TOOL, 'campaign_1')
+
+    assert [s['status'] for s in statuses] == ['unknown'] * 3
+    assert post.call_count == 1
+
+
+def test_batch_error_status_marks_chunk_failed(post):
+    post.return_value = response(400, {'error': 'bad request'})
+
+    statuses = OutreachExecutorAgent(None)._send_email_apollo_batch(MESSAGES, APOLLO_TOOL, 'campaign_1')
+
+    assert [s['status'] for s in statuses] == ['failed'] * 3
+    assert all('400' in s['error'] for s in statuses)
+    assert post.call_count == 1
@@ -0,0 +1,101 @@
+"""
+Tests for ScoringAgent's vectorized scoring
+"""
+import random
+import pytest
+from agents.scoringagent import ScoringAgent
+
+
+def baseline_score(lead, criteria):
+    """The original per-lead scoring formula the vectorized version must reproduce"""
+    score = 0.0
+    if lead.get('seniority') in criteria.get('preferred_seniority', []):
+        score += criteria.get('seniority_weight', 0.3) * 100
+    if lead.get('company_size') in criteria.get('preferred_company_sizes', []):
+        score += criteria.get('company_size_weight', 0.2) * 100
+    lead_tech = set(lead.get('technologies', []))
+    preferred_tech = set(criteria.get('preferred_technologies', []))
+    tech_overlap = len(lead_tech.intersection(preferred_tech))
+    if tech_overlap > 0:
+        score += criteria.get('tech_stack_weight', 0.2) * 100 * (tech_overlap / len(preferred_tech))
+    if lead.get('signal'):
+        score += criteria.get('signal_weight', 0.3) * 100
+    return round(score, 2)
+
+
+def baseline_grade(score):
+    if score >= 80:
+        return 'A'
+    elif score >= 60:
+        return 'B'
+    elif score >= 40:
+        return 'C'
+    return 'D'
+
+
+def random_leads(count, seed):
+    rng = random.Random(seed)
+    technologies = ['Salesforce', 'HubSpot', 'Outreach', 'Snowflake', 'Segment']
+    return [
+        {
+            'seniority': rng.choice(['Executive', 'Manager', 'Individual Contributor', None]),
+            'company_size': rng.choice(['1-50', '100-500', '500-1000', None]),
+            'technologies': rng.sample(technologies, rng.randint(0, 4)) * rng.randint(1, 2),
+            'signal': rng.choice(['Recent $10M Series B', '', None])
+        }
+        for _ in range(count)
+    ]
+
+
+CRITERIA = [
+    ScoringAgent(None)._default_scoring_criteria(),
+    {
+        'seniority_weight': 0.15,
+        'company_size_weight': 0.35,
+        'tech_stack_weight': 0.35,
+        'signal_weight': 0.15,
+        'preferred_seniority': ['Executive'],
+        'preferred_company_sizes': ['500-1000'],
+        'preferred_technologies': ['Salesforce', 'HubSpot', 'Snowflake']
+    },
+    {'preferred_seniority': ['Manager'], 'preferred_technologies': []},
+    {},
+]
+
+
+@pytest.mark.parametrize('criteria', CRITERIA)
+def test_scores_and_grades_match_baseline(criteria):
+    agent = ScoringAgent(None)
+    leads = random_leads(500, seed=len(criteria))
+
+    scores = agent._calculate_scores(leads, criteria)
+    grades = agent._assign_grades(scores)
+
+    assert scores.tolist() == [baseline_score(lead, criteria) for lead in leads]
+    assert grades.tolist() == [baseline_grade(score) for score in scores.tolist()]
+
+
+def test_act_ranks_like_a_stable_sort():
+    agent = ScoringAgent(None)
+    leads = random_leads(200, seed=7)
+    criteria = agent._default_scoring_criteria()
+    # sorted() is stable, so tied leads must keep their input order
+    expected = sorted(leads, key=lambda lead: baseline_score(lead, criteria), reverse=True)
+    expected_ids = [id(lead) for lead in expected]
+
+    result = agent._act('', {'enriched_leads': leads}, [])
+
+    assert [id(lead) for lead in result['ranked_leads']] == expected_ids
+    assert [id(lead) for lead in result['top_leads']] == expected_ids[:10]
+    assert sum(result['grade_counts'].values()) == len(leads)
+    scores = [baseline_score(lead, criteria) for lead in leads]
+    assert result['average_score'] == pytest.approx(sum(scores) / len(scores))
+
+
+def test_act_handles_no_leads():
+    result = ScoringAgent(None)._act('', {'enriched_leads': []}, [])
+
+    assert result['ranked_leads'] == []
+    assert result['top_leads'] == []
+    assert result['average_score'] == 0
+    assert result['grade_counts'] == {}